@@ -0,0 +1,32 @@
+import argparse
+
+from . import bench_embeds, bench_queue, bench_regex
+from .harness import compare, dump, load, run
+
+SUITES = {
+    'queue': bench_queue.cases,
+    'regex': bench_regex.cases,
+    'embeds': bench_embeds.cases,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('-k', dest='pattern', help='only run cases whose key contains this')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help='write results as JSON to this file')
+    parser.add_argument('-c', '--compare', help='JSON results to compare against')
+    args = parser.parse_args()
+
+    results = run(SUITES, args.pattern, args.repeat)
+
+    if args.output:
+        dump(results, args.output)
+
+    if args.compare:
+        print()
+        compare(load(args.compare), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import discord
+
+from bot.cogs.music import HZ_BANDS, Queue, choice_embed, custom_equalizer, queue_embed, queue_page
+from bot.utils import CompactTrack
+
+AUTHOR = SimpleNamespace(
+    colour=discord.Colour.blurple(),
+    display_name='Benchmark',
+    avatar_url='https://cdn.discordapp.com/embed/avatars/0.png',
+)
+
+
+def tracks(size):
+    return [CompactTrack(f'blob{i}', f'Artist {i % 50} - Song {i} (Official Video)', 'Artist',
+                         180_000 + i, f'https://x/{i}') for i in range(size)]
+
+
+def cases():
+    results = tracks(5)
+    yield 'choice_embed', {'results': 5}, lambda: choice_embed(AUTHOR, results)
+
+    for size in (10, 1_000, 100_000):
+        queue = Queue()
+        queue.add(*tracks(size))
+
+        for page in sorted({0, size // 20}):
+            yield 'queue_page', {'size': size, 'page': page}, \
+                lambda queue=queue, page=page: queue_page(queue, page, 60_000, 1_700_000_000)
+
+        yield 'queue_embed', {'size': size}, \
+            lambda queue=queue: queue_embed(AUTHOR, queue, queue_page(queue, 0, 60_000, 1_700_000_000))
+
+    levels = [0.] * len(HZ_BANDS)
+    yield 'custom_equalizer', {'bands': len(HZ_BANDS)}, lambda: custom_equalizer(levels)
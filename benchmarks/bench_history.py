@@ -0,0 +1,67 @@
+import gc
+import os
+import tempfile
+import timeit
+import tracemalloc
+
+from bot.cogs.music import HISTORY_DISK_SIZE, HISTORY_SIZE, Queue
+from bot.utils import CompactTrack
+
+PLAYED = 50_000
+
+
+def tracks(count):
+    return [CompactTrack(f'QAAA{i:08d}' * 12, f'Artist {i % 500} - Song number {i} (Official Video)',
+                         f'Artist {i % 500}', 180_000, f'https://www.youtube.com/watch?v={i:011d}')
+            for i in range(count)]
+
+
+def radio(history_size, path):
+    # A 24/7 guild: one track queued and played at a time, for a long time.
+    queue = Queue(path, history_size)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    for i, track in enumerate(tracks(PLAYED)):
+        queue.add(track)
+
+        if i:
+            queue.get_next_track()
+
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return queue, after - before
+
+
+def step(queue, offset):
+    def run():
+        position = queue.position
+        queue.skip_to(position + offset)
+        queue.get_next_track()
+        queue.position = position
+
+    number, _ = timeit.Timer(run).autorange()
+    return min(timeit.Timer(run).repeat(repeat=5, number=number)) / number
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='bench-history-')
+
+    print(f'{PLAYED} tracks played, history kept in memory: {HISTORY_SIZE}, on disk: {HISTORY_DISK_SIZE}')
+    print(f'{"queue":<10} {"memory KB":>10} {"disk KB":>8} {"previous (us)":>14} {"back 10k (us)":>14}')
+
+    for name, size in (('unbounded', PLAYED), ('bounded', HISTORY_SIZE)):
+        queue, used = radio(size, os.path.join(workdir, f'{name}.jsonl'))
+        footprint = queue.footprint()
+        previous = step(queue, -1) * 1e6
+        back = step(queue, -10_000) * 1e6
+        print(f'{name:<10} {used / 1024:>10.0f} {footprint["disk_bytes"] / 1024:>8.0f} '
+              f'{previous:>14.1f} {back:>14.1f}')
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
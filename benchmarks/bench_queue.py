@@ -0,0 +1,60 @@
+import timeit
+
+from bot.cogs.music import Queue, RepeatMode
+from bot.utils import CompactTrack
+
+from .legacy import LegacyQueue
+
+SIZES = (10, 1_000, 10_000, 100_000)
+OPERATIONS = {
+    # A fresh queue of the same class taking all of the built queue's tracks.
+    'add': lambda q: type(q)().add(*q.items),
+    'upcoming_check': lambda q: not q.upcoming,
+    'history_check': lambda q: not q.history,
+    'upcoming_window': lambda q: q.upcoming[:10],
+    'history_window': lambda q: q.history[-10:],
+    'get_next_track': lambda q: q.get_next_track(),
+    'shuffle': lambda q: q.shuffle(),
+    'skip_to': lambda q: q.skip_to(q.length // 2),
+}
+
+
+def tracks(size):
+    return [CompactTrack(f'blob{i}', f'Song {i}', 'Artist', 180_000, f'https://x/{i}')
+            for i in range(size)]
+
+
+def build(cls, size):
+    queue = cls()
+    queue.items = tracks(size)
+    queue.add(*queue.items)
+    queue.position = size // 2
+    queue.repeat_mode = RepeatMode.ALL
+    return queue
+
+
+def cases():
+    for size in SIZES:
+        for name, func in OPERATIONS.items():
+            queue = build(Queue, size)
+            yield name, {'size': size}, lambda func=func, queue=queue: func(queue)
+
+
+def measure(func, queue):
+    number, _ = timeit.Timer(lambda: func(queue)).autorange()
+    best = min(timeit.Timer(lambda: func(queue)).repeat(repeat=5, number=number))
+    return best / number
+
+
+def main():
+    print(f'{"operation":<16} {"size":>8} {"legacy (us)":>12} {"queue (us)":>12} {"speedup":>8}')
+
+    for name, func in OPERATIONS.items():
+        for size in SIZES:
+            legacy = measure(func, build(LegacyQueue, size)) * 1e6
+            current = measure(func, build(Queue, size)) * 1e6
+            print(f'{name:<16} {size:>8} {legacy:>12.2f} {current:>12.2f} {legacy / current:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import re
+
+from bot.cogs.music import TIME_REGEX
+from bot.utils import classify
+
+from .legacy import URL_REGEX
+
+URL_INPUTS = {
+    'search': 'never gonna give you up rick astley',
+    'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL590L5WQmH8fJ54F369BLDSqIwcs-TCfs',
+    'long_search': 'lorem ipsum ' * 200,
+    'long_url': 'https://example.com/' + 'a' * 2_000,
+    # An unclosed parenthesis makes the nested quantifiers backtrack
+    # exponentially in its length.
+    'unclosed_paren_8': 'http://a(' + 'b' * 8,
+    'unclosed_paren_12': 'http://a(' + 'b' * 12,
+    'unclosed_paren_16': 'http://a(' + 'b' * 16,
+    'unclosed_paren_18': 'http://a(' + 'b' * 18,
+}
+
+# Too slow for the old regex: only classify() runs these.
+CLASSIFY_INPUTS = {
+    'unclosed_paren_10000': 'http://a(' + 'b' * 10_000,
+    'many_params': 'https://www.youtube.com/watch?' + '&'.join(f'p{i}=x' for i in range(2_000)) + '&v=dQw4w9WgXcQ',
+    'dotted_host': 'a.' * 5_000 + 'com/x',
+}
+
+TIME_INPUTS = {
+    'mm:ss': '3:25',
+    'seconds': '45s',
+    'digits': '9' * 10_000,
+    'repeated': '1m' * 5_000,
+}
+
+
+def cases():
+    for name, text in URL_INPUTS.items():
+        yield 'url_regex', {'input': name}, lambda text=text: re.match(URL_REGEX, text)
+        yield 'classify', {'input': name}, lambda text=text: classify(text)
+
+    for name, text in CLASSIFY_INPUTS.items():
+        yield 'classify', {'input': name}, lambda text=text: classify(text)
+
+    for name, text in TIME_INPUTS.items():
+        yield 'time_regex', {'input': name}, lambda text=text: re.match(TIME_REGEX, text)
@@ -0,0 +1,62 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from bot.utils import CompactTrack, SearchIndex
+
+SIZES = (1_000, 10_000, 100_000)
+QUERIES = 200
+
+
+def tracks(count, rng):
+    # Titles drawn from a Zipf-weighted vocabulary, so a few words show up
+    # everywhere and most are rare, as in real song titles.
+    vocabulary = [f'w{i}' for i in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    items = []
+
+    for i in range(count):
+        words = ' '.join(rng.choices(vocabulary, weights, k=rng.randint(2, 5)))
+        items.append(CompactTrack(f'QAAA{i:08d}', f'Artist {i % 2000} - {words} (Official Video)',
+                                  f'Artist {i % 2000}', 180_000, f'https://www.youtube.com/watch?v={i:011d}'))
+
+    return items
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - started) * 1e6, result
+
+
+def main():
+    rng = random.Random(0)
+    workdir = tempfile.mkdtemp(prefix='bench-search-')
+
+    print(f'{"tracks":>8} {"add/track":>10} {"open":>9} {"cold hit":>9} {"warm hit":>9} {"miss":>9}   (us)')
+
+    for size in SIZES:
+        path = os.path.join(workdir, f'{size}.sqlite3')
+        index = SearchIndex(path, maxsize=size)
+        items = tracks(size, rng)
+        added, _ = timed(index.add, items)
+        index.close()
+
+        # Cold: a fresh process opening the index and answering its first
+        # search. Warm: the same searches once SQLite has the pages cached.
+        opened, index = timed(SearchIndex, path, size)
+        queries = [items[i].title.split(' (')[0] for i in rng.sample(range(size), QUERIES)]
+        cold, found = timed(index.best, queries[0])
+        assert found is not None
+
+        warm = statistics.median(timed(index.best, q)[0] for q in queries)
+        miss = statistics.median(timed(index.best, f'never played {i}')[0] for i in range(QUERIES))
+        index.close()
+
+        print(f'{size:>8} {added / size:>10.1f} {opened:>9.0f} {cold:>9.0f} {warm:>9.0f} {miss:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
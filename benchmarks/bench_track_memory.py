@@ -0,0 +1,86 @@
+import base64
+import gc
+import json
+import struct
+import tracemalloc
+
+import wavelink
+
+from bot.utils import CompactTrack, decode_track
+
+COUNT = 20_000
+
+
+def _utf(text):
+    raw = text.encode('utf-8')
+    return struct.pack('>H', len(raw)) + raw
+
+
+def encode_track(info, version=2):
+    body = struct.pack('>B', version)
+    body += _utf(info['title']) + _utf(info['author'])
+    body += struct.pack('>q', info['length'])
+    body += _utf(info['identifier']) + struct.pack('>?', info['isStream'])
+    body += struct.pack('>?', True) + _utf(info['uri'])
+    body += _utf(info['sourceName']) + struct.pack('>q', info['position'])
+    header = struct.pack('>i', (1 << 30) | len(body))
+    return base64.b64encode(header + body).decode()
+
+
+def payload(count):
+    tracks = []
+
+    for i in range(count):
+        identifier = f'{i:011d}'
+        info = {
+            'identifier': identifier,
+            'isSeekable': True,
+            'author': f'Artist {i % 500}',
+            'length': 180_000 + i,
+            'isStream': False,
+            'position': 0,
+            'title': f'Artist {i % 500} - Song number {i} (Official Video)',
+            'uri': f'https://www.youtube.com/watch?v={identifier}',
+            'sourceName': 'youtube',
+        }
+        tracks.append({'track': encode_track(info), 'info': info})
+
+    # Round-trip through JSON so every track owns its strings, as it would
+    # coming out of Lavalink's REST response.
+    return json.dumps(tracks)
+
+
+def measure(build, raw):
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracks = build(json.loads(raw))
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(tracks), tracks
+
+
+def main():
+    raw = payload(COUNT)
+
+    def full(data):
+        return [wavelink.Track(id_=t['track'], info=t['info']) for t in data]
+
+    def compact(data):
+        return [CompactTrack.from_track(t) for t in full(data)]
+
+    full_bytes, tracks = measure(full, raw)
+    compact_bytes, compact_tracks = measure(compact, raw)
+
+    assert decode_track(tracks[0].id)['identifier'] == tracks[0].identifier
+    assert compact_tracks[-1].identifier == tracks[-1].identifier
+
+    print(f'{"record":<16} {"bytes/track":>12}')
+    print(f'{"wavelink.Track":<16} {full_bytes:>12.0f}')
+    print(f'{"CompactTrack":<16} {compact_bytes:>12.0f}')
+    print(f'{"saved":<16} {1 - compact_bytes / full_bytes:>12.0%}')
+
+
+if __name__ == '__main__':
+    main()
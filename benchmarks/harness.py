@@ -0,0 +1,77 @@
+import datetime as dt
+import json
+import platform
+import subprocess
+import sys
+import timeit
+
+
+def measure(func, repeat=5):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suites, pattern=None, repeat=5, out=sys.stdout):
+    results = []
+
+    for suite, cases in suites.items():
+        for name, params, func in cases():
+            key = f'{suite}.{name}' + ''.join(f'[{k}={v}]' for k, v in params.items())
+
+            if pattern and pattern not in key:
+                continue
+
+            seconds = measure(func, repeat)
+            results.append({
+                'suite': suite,
+                'name': name,
+                'params': params,
+                'key': key,
+                'seconds': seconds,
+            })
+            print(f'{key:<60} {seconds * 1e6:>14.2f} us', file=out)
+
+    return {
+        'meta': {
+            'timestamp': dt.datetime.utcnow().isoformat(timespec='seconds'),
+            'revision': revision(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, out=sys.stdout):
+    before = {r['key']: r['seconds'] for r in baseline['results']}
+
+    print(f'{"case":<60} {"before (us)":>12} {"after (us)":>12} {"ratio":>8}', file=out)
+    for result in current['results']:
+        if (old := before.get(result['key'])) is None:
+            continue
+
+        ratio = result['seconds'] / old
+        print(f'{result["key"]:<60} {old * 1e6:>12.2f} {result["seconds"] * 1e6:>12.2f} '
+              f'{ratio:>7.2f}x', file=out)
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def dump(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
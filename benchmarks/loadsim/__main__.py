@@ -0,0 +1,25 @@
+import argparse
+
+from .driver import main
+
+
+def guild_counts(text):
+    return [int(n) for n in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadsim')
+    parser.add_argument('-g', '--guilds', type=guild_counts, default=[10, 100, 1000],
+                        help='comma separated guild counts, one run each')
+    parser.add_argument('-d', '--duration', type=float, default=30.0)
+    parser.add_argument('-i', '--interval', type=float, default=5.0,
+                        help='mean seconds between commands in each guild')
+    parser.add_argument('-p', '--port', type=int, default=2399)
+    parser.add_argument('--catalog', type=int, default=500, help='distinct songs users ask for')
+    parser.add_argument('--results', type=int, default=5, help='tracks per search result')
+    parser.add_argument('--track-seconds', type=float, default=20.0)
+    parser.add_argument('--lavalink-latency', type=float, default=0.05)
+    parser.add_argument('--voice-latency', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='write results as JSON to this file')
+    main(parser.parse_args())
@@ -0,0 +1,292 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from functools import partial
+
+import aiohttp
+
+from bot.utils import RollingStats
+
+from . import lavalink
+
+COMMANDS = {
+    'play': 0.3,
+    'batch': 0.05,
+    'queue': 0.2,
+    'skip': 0.15,
+    'eq': 0.1,
+    'volume': 0.05,
+    'seek': 0.1,
+    'voice': 0.05,
+    'autoplay': 0.02,
+    'playing': 0.03,
+}
+EQ_PRESETS = ('flat', 'boost', 'metal', 'piano')
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def zipf_catalog(size, rng):
+    # A few songs get most of the requests, like in a real server.
+    weights = [1 / (rank + 1) for rank in range(size)]
+    return lambda: rng.choices(range(size), weights)[0]
+
+
+def command_text(name, rng, song):
+    if name == 'play':
+        if rng.random() < 0.2:
+            return f'-play https://www.youtube.com/watch?v=sim{song()}'
+        if rng.random() < 0.05:
+            return f'-play https://www.youtube.com/playlist?list=sim{song()}'
+        return f'-play song number {song()}'
+    if name == 'batch':
+        return '-play ' + ' | '.join(f'song number {song()}' for _ in range(rng.randint(2, 8)))
+    if name == 'queue':
+        return '-queue'
+    if name == 'skip':
+        return '-next'
+    if name == 'eq':
+        return f'-eq {rng.choice(EQ_PRESETS)}'
+    if name == 'volume':
+        return f'-volume {rng.choice(("up", "down"))}'
+    if name == 'seek':
+        return f'-seek {rng.randint(0, 2)}:{rng.randint(0, 59):02d}'
+    if name == 'autoplay':
+        return '-autoplay'
+    if name == 'playing':
+        return '-np'
+
+
+async def session(bot, guild, member, args, rng, song, latencies, stop_at):
+    await asyncio.sleep(rng.uniform(0, args.interval))
+    names, weights = zip(*COMMANDS.items())
+    name = 'play'
+
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+
+        if name == 'voice':
+            # Another listener hops between channels; the event handler
+            # runs later, so this only measures the dispatch.
+            inside = guild.friend.voice.channel is guild.voice_channel
+            bot.move_member(guild, guild.friend, guild.lobby if inside else guild.voice_channel)
+        else:
+            await bot.invoke_text(guild, member, command_text(name, rng, song))
+
+        latencies[name].add((time.perf_counter() - started) * 1000)
+
+        await asyncio.sleep(rng.expovariate(1 / args.interval))
+        name = rng.choices(names, weights)[0]
+
+
+async def sample_lag(stats, interval=0.05):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.add((time.perf_counter() - started - interval) * 1000)
+
+
+async def wait_for_node(cog, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+
+    while not any(n.is_available for n in cog.wavelink.nodes.values()):
+        if time.perf_counter() > deadline:
+            raise RuntimeError('fake Lavalink node never became available')
+        await asyncio.sleep(0.05)
+
+
+async def fetch_counters(port):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'http://127.0.0.1:{port}/sim/counters') as r:
+            return await r.json()
+
+
+def configure(music, args, workdir):
+    nodes = os.path.join(workdir, 'nodes.json')
+    with open(nodes, 'w') as f:
+        json.dump({'SIM': {
+            'host': '127.0.0.1',
+            'port': args.port,
+            'rest_uri': f'http://127.0.0.1:{args.port}',
+            'password': 'sim',
+            'identifier': 'SIM',
+            'region': 'brazil',
+        }}, f)
+
+    music.NODES_PATH = nodes
+    music.STATE_PATH = os.path.join(workdir, 'state')
+    music.TRACK_CACHE_PATH = None
+    music.AUTOPLAY_PATH = None
+    music.SEARCH_INDEX_PATH = None
+    music.LYRICS_PREFETCH = False
+
+
+async def run_level(guilds, args):
+    with tempfile.TemporaryDirectory(prefix='loadsim-') as workdir:
+        return await _run_level(guilds, args, workdir)
+
+
+async def _run_level(guilds, args, workdir):
+    from bot.cogs import music
+
+    from .gateway import SimBot
+
+    rng = random.Random(args.seed)
+    song = zipf_catalog(args.catalog, rng)
+    bot = SimBot(voice_latency=args.voice_latency)
+    configure(music, args, workdir)
+    music.setup(bot)
+    cog = bot.get_cog('Musiking')
+    bot._ready.set()
+    await wait_for_node(cog)
+
+    members = [bot.add_guild(10_000 + i) for i in range(guilds)]
+    baseline = await fetch_counters(args.port)
+    rss_before = rss_mb()
+    latencies = defaultdict(partial(RollingStats, maxlen=100_000))
+    lag = RollingStats(maxlen=100_000)
+    lag_task = asyncio.ensure_future(sample_lag(lag))
+    stop_at = time.perf_counter() + args.duration
+
+    await asyncio.gather(*(
+        session(bot, guild, member, args, random.Random(rng.random()), song, latencies, stop_at)
+        for guild, member in members))
+
+    lag_task.cancel()
+    counters = await fetch_counters(args.port)
+    result = {
+        'guilds': guilds,
+        'duration': args.duration,
+        'commands': {name: stats.summary for name, stats in sorted(latencies.items())},
+        'loop_lag_ms': lag.summary,
+        'rss_mb': {'before': round(rss_before, 1), 'after': round(rss_mb(), 1)},
+        'players': len(cog.wavelink.players),
+        'track_gaps_ms': cog.track_gaps.summary,
+        'track_cache': cog.track_cache.stats,
+        'lookups': cog.lookups.stats,
+        'search_index': cog.search_index.stats,
+        'mailbox': {
+            'processed': sum(p.mailbox.processed for p in cog.wavelink.players.values()),
+            'dropped': sum(p.mailbox.dropped for p in cog.wavelink.players.values()),
+            'p95_ms': max((p.mailbox.latency.percentile(95) for p in cog.wavelink.players.values()), default=0.0),
+        },
+        'messages': {'sent': sum(bot.sent.values()), 'edited': bot.edited},
+        'outbox': {
+            **{k: v for k, v in cog.outbox.stats.items() if k != 'latency_ms'},
+            'p95_ms': {p: round(s['p95'], 1) for p, s in cog.outbox.stats['latency_ms'].items() if s['count']},
+        },
+        'panels': {
+            event: sum(p.panel.stats[event] for p in cog.wavelink.players.values())
+            for event in ('requested', 'posted', 'edits', 'skipped')
+        },
+        'lavalink': {k: v - baseline.get(k, 0) for k, v in counters.items()},
+        'errors': dict(bot.errors),
+    }
+
+    for player in list(cog.wavelink.players.values()):
+        await player.teardown()
+
+    bot.remove_cog('Musiking')
+    await cog.wavelink.session.close()
+    return result
+
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1.0).close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _level_process(guilds, args, results):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        results.put(loop.run_until_complete(run_level(guilds, args)))
+    except BaseException as exc:
+        results.put(exc)
+        raise
+
+
+def fmt(summary):
+    if not summary.get('count'):
+        return '-'
+    return f'{summary["p50"]:.1f} / {summary["p95"]:.1f} / {summary["p99"]:.1f} / {summary["max"]:.1f}'
+
+
+def report(result):
+    print(f'\n{result["guilds"]} guilds, {result["duration"]:.0f}s, '
+          f'{result["players"]} players, RSS {result["rss_mb"]["before"]} -> '
+          f'{result["rss_mb"]["after"]} MB')
+    print(f'  {"command":<8} {"count":>7}  latency ms p50 / p95 / p99 / max')
+
+    for name, summary in result['commands'].items():
+        print(f'  {name:<8} {summary["count"]:>7}  {fmt(summary)}')
+
+    print(f'  loop lag ms p50 / p95 / p99 / max: {fmt(result["loop_lag_ms"])}')
+    print(f'  track gaps ms p50 / p95 / p99 / max: {fmt(result["track_gaps_ms"])}')
+    print(f'  lavalink: {result["lavalink"]}')
+    print(f'  track cache: {result["track_cache"]}')
+    print(f'  search index: {result["search_index"]}')
+    print(f'  mailbox: {result["mailbox"]}')
+    print(f'  messages: {result["messages"]}, panels: {result["panels"]}')
+    print(f'  outbox: {result["outbox"]}')
+
+    if result['errors']:
+        print(f'  errors: {result["errors"]}')
+
+
+def main(args):
+    ctx = multiprocessing.get_context('spawn')
+    server = ctx.Process(target=lavalink.serve, args=(args.port,), kwargs={
+        'latency': args.lavalink_latency,
+        'results': args.results,
+        'track_seconds': args.track_seconds,
+    }, daemon=True)
+    server.start()
+    wait_for_port(args.port)
+
+    results = []
+    try:
+        for guilds in args.guilds:
+            # Every level runs in a fresh process so memory numbers do not
+            # carry over between them.
+            queue = ctx.Queue()
+            worker = ctx.Process(target=_level_process, args=(guilds, args, queue))
+            worker.start()
+            result = queue.get()
+            worker.join()
+
+            if isinstance(result, BaseException):
+                raise result
+
+            report(result)
+            results.append(result)
+    finally:
+        server.terminate()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'argv': sys.argv[1:], 'levels': results}, f, indent=2)
+
+    return results
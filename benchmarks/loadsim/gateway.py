@@ -0,0 +1,181 @@
+import itertools
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+
+from bot import Musiking
+
+BOT_ID = 1
+_ids = itertools.count(1_000_000)
+
+
+class FakeUser:
+    def __init__(self, id_, name, bot=False):
+        self.id = id_
+        self.name = self.display_name = name
+        self.bot = bot
+        self.mention = f'<@{id_}>'
+        self.colour = discord.Colour.default()
+        self.avatar_url = 'https://cdn.discordapp.com/embed/avatars/0.png'
+        self.voice = None
+
+
+class FakeChannel:
+    def __init__(self, guild, name):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.members = []
+
+
+class FakeGuild:
+    def __init__(self, id_, region='brazil'):
+        self.id = id_
+        self.name = f'guild-{id_}'
+        self.region = region
+        self.shard_id = 0
+        self.text_channel = FakeChannel(self, 'geral')
+        self.voice_channel = FakeChannel(self, 'música')
+        self.lobby = FakeChannel(self, 'lobby')
+        self._channels = {c.id: c for c in (self.text_channel, self.voice_channel, self.lobby)}
+
+    def get_channel(self, id_):
+        return self._channels.get(id_)
+
+
+class FakeReaction:
+    def __init__(self, emoji, message):
+        self.emoji = emoji
+        self.message = message
+
+
+class FakeMessage:
+    def __init__(self, bot, channel, author, content='', embed=None, requester=None):
+        self.id = next(_ids)
+        self.bot = bot
+        self._state = bot._connection
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = [embed] if embed is not None else []
+        self.mentions = []
+        self.attachments = []
+        self.requester = requester
+        self._reacted = False
+
+    async def add_reaction(self, emoji):
+        # The simulated user picks the first option as soon as the menu
+        # shows up.
+        if self.requester is not None and not self._reacted:
+            self._reacted = True
+            self.bot.loop.call_later(
+                self.bot.think_time, self.bot.dispatch, 'reaction_add',
+                FakeReaction(emoji, self), self.requester)
+
+    async def edit(self, **kwargs):
+        self.bot.edited += 1
+
+    async def remove_reaction(self, emoji, member):
+        pass
+
+    async def clear_reactions(self):
+        pass
+
+    async def delete(self):
+        pass
+
+
+class _Typing:
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class SimContext(commands.Context):
+    async def send(self, content=None, *, embed=None, **kwargs):
+        self.bot.sent[self.command.qualified_name if self.command else None] += 1
+        return FakeMessage(self.bot, self.channel, self.bot.user, content, embed, self.author)
+
+    def typing(self):
+        return _Typing()
+
+
+class FakeGateway:
+    def __init__(self, bot, latency=0.02):
+        self.bot = bot
+        self.latency = latency
+
+    async def voice_state(self, guild_id, channel_id, self_mute=False, self_deaf=False):
+        self.bot.loop.call_later(self.latency, self._voice_events, guild_id, channel_id)
+
+    def _voice_events(self, guild_id, channel_id):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(int(channel_id)) if channel_id is not None else None
+        self.bot.move_member(guild, self.bot.members[guild_id], channel)
+        self.bot.dispatch('socket_response', {'t': 'VOICE_STATE_UPDATE', 'd': {
+            'guild_id': str(guild_id), 'user_id': str(BOT_ID),
+            'session_id': f'sim-{guild_id}', 'channel_id': channel_id}})
+
+        if channel_id is not None:
+            self.bot.dispatch('socket_response', {'t': 'VOICE_SERVER_UPDATE', 'd': {
+                'guild_id': str(guild_id), 'token': 'sim', 'endpoint': 'sim.discord.media:443'}})
+
+
+class SimBot(Musiking):
+    def __init__(self, voice_latency=0.02, think_time=0.0):
+        super().__init__()
+        self.think_time = think_time
+        self.sim_guilds = {}
+        self.members = {}
+        self.sent = Counter()
+        self.edited = 0
+        self.errors = Counter()
+        self._connection.user = FakeUser(BOT_ID, 'MusiKing', bot=True)
+        self.logged_in.set()
+        # wavelink reaches the gateway through the shard that owns the guild.
+        self._AutoShardedClient__shards = {
+            0: SimpleNamespace(id=0, ws=FakeGateway(self, voice_latency))}
+
+    def add_guild(self, guild_id, region='brazil'):
+        guild = self.sim_guilds[guild_id] = FakeGuild(guild_id, region)
+        member = FakeUser(next(_ids), f'user-{guild_id}')
+        self.members[guild_id] = FakeUser(BOT_ID, 'MusiKing', bot=True)
+        self.move_member(guild, member, guild.voice_channel, dispatch=False)
+        guild.friend = FakeUser(next(_ids), f'friend-{guild_id}')
+        self.move_member(guild, guild.friend, guild.lobby, dispatch=False)
+        return guild, member
+
+    def move_member(self, guild, member, channel, dispatch=True):
+        before = getattr(member.voice, 'channel', None)
+
+        if before is not None:
+            before.members.remove(member)
+        if channel is not None:
+            channel.members.append(member)
+
+        member.guild = guild
+        member.voice = SimpleNamespace(channel=channel) if channel is not None else None
+
+        if dispatch:
+            self.dispatch('voice_state_update', member,
+                          SimpleNamespace(channel=before), SimpleNamespace(channel=channel))
+
+    def get_guild(self, id_):
+        return self.sim_guilds.get(id_)
+
+    async def invoke_text(self, guild, member, content):
+        msg = FakeMessage(self, guild.text_channel, member, content)
+        ctx = await self.get_context(msg, cls=SimContext)
+        await self.invoke(ctx)
+        return ctx
+
+    async def on_command_error(self, ctx, exc):
+        self.errors[type(getattr(exc, 'original', exc)).__name__] += 1
+
+    async def on_error(self, event, *args, **kwargs):
+        self.errors[f'event:{event}'] += 1
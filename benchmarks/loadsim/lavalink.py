@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+
+from aiohttp import WSMsgType, web
+
+from ..bench_track_memory import encode_track
+
+PLAYLIST_SIZE = 25
+
+
+class FakeLavalink:
+    def __init__(self, latency=0.05, results=5, track_seconds=30.0, stats_interval=5.0):
+        self.latency = latency
+        self.results = results
+        self.track_seconds = track_seconds
+        self.stats_interval = stats_interval
+        self.counters = Counter()
+        self.started = time.time()
+        self._players = {}
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/', self.websocket)
+        app.router.add_get('/loadtracks', self.loadtracks)
+        app.router.add_get('/sim/counters', self.sim_counters)
+        return app
+
+    def track(self, key):
+        identifier = hashlib.sha1(key.encode()).hexdigest()[:11]
+        info = {
+            'identifier': identifier,
+            'isSeekable': True,
+            'author': f'Artist {identifier[:3]}',
+            'length': int(self.track_seconds * 1000),
+            'isStream': False,
+            'position': 0,
+            'title': f'Song {key}',
+            'uri': f'https://www.youtube.com/watch?v={identifier}',
+            'sourceName': 'youtube',
+        }
+        return {'track': encode_track(info), 'info': info}
+
+    async def loadtracks(self, request):
+        identifier = request.query['identifier']
+        self.counters['loadtracks'] += 1
+        await asyncio.sleep(self.latency)
+
+        if identifier.startswith('ytsearch:'):
+            query = identifier[len('ytsearch:'):]
+            tracks = [self.track(f'{query}#{i}') for i in range(self.results)]
+            data = {'loadType': 'SEARCH_RESULT', 'playlistInfo': {}, 'tracks': tracks}
+        elif 'list=' in identifier:
+            tracks = [self.track(f'{identifier}#{i}') for i in range(PLAYLIST_SIZE)]
+            data = {
+                'loadType': 'PLAYLIST_LOADED',
+                'playlistInfo': {'name': identifier, 'selectedTrack': -1},
+                'tracks': tracks,
+            }
+        else:
+            data = {'loadType': 'TRACK_LOADED', 'playlistInfo': {}, 'tracks': [self.track(identifier)]}
+
+        return web.json_response(data)
+
+    async def sim_counters(self, request):
+        return web.json_response(dict(self.counters))
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.counters['websockets'] += 1
+        stats = asyncio.ensure_future(self._send_stats(ws))
+
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    await self._handle(ws, json.loads(msg.data))
+        finally:
+            stats.cancel()
+            for timer, _ in self._players.values():
+                timer.cancel()
+            self._players.clear()
+
+        return ws
+
+    async def _handle(self, ws, data):
+        op = data['op']
+        self.counters[f'op_{op}'] += 1
+        guild_id = data.get('guildId')
+
+        if op == 'play':
+            await self._end(ws, guild_id, 'REPLACED')
+            await self._event(ws, guild_id, 'TrackStartEvent', data['track'])
+            timer = asyncio.get_event_loop().call_later(
+                self.track_seconds,
+                lambda: asyncio.ensure_future(self._end(ws, guild_id, 'FINISHED')))
+            self._players[guild_id] = (timer, data['track'])
+        elif op == 'stop':
+            await self._end(ws, guild_id, 'STOPPED')
+        elif op == 'destroy':
+            if (player := self._players.pop(guild_id, None)) is not None:
+                player[0].cancel()
+
+    async def _end(self, ws, guild_id, reason):
+        if (player := self._players.pop(guild_id, None)) is None:
+            return
+
+        timer, track = player
+        timer.cancel()
+        await self._event(ws, guild_id, 'TrackEndEvent', track, reason=reason)
+
+    async def _event(self, ws, guild_id, type_, track, **extra):
+        if not ws.closed:
+            await ws.send_json(
+                {'op': 'event', 'type': type_, 'guildId': guild_id, 'track': track, **extra})
+
+    async def _send_stats(self, ws):
+        while not ws.closed:
+            await ws.send_json({
+                'op': 'stats',
+                'players': len(self._players),
+                'playingPlayers': len(self._players),
+                'uptime': int((time.time() - self.started) * 1000),
+                'memory': {'free': 0, 'used': 0, 'allocated': 0, 'reservable': 0},
+                'cpu': {'cores': 4, 'systemLoad': 0.1, 'lavalinkLoad': 0.05},
+                'frameStats': {'sent': 3000, 'nulled': 0, 'deficit': 0},
+            })
+            await asyncio.sleep(self.stats_interval)
+
+
+def serve(port, **kwargs):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    runner = web.AppRunner(FakeLavalink(**kwargs).app())
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+    loop.run_forever()
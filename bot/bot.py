@@ -1,29 +1,74 @@
+import asyncio
+import time
 from pathlib import Path
 
+import discord
 from discord.ext import commands
 
+TOKEN_PATH = "data/token.0"
+COGS_PATH = Path(__file__).parent / "cogs"
+STARTUP_PHASES = ("setup", "login", "gateway", "nodes", "restore")
 
-class Musiking(commands.Bot):
-    def __init__(self):
-        self._cogs = [p.stem for p in Path(".").glob("./bot/cogs/*.py")]
-        super().__init__(command_prefix=self.prefix, case_insensitive=True)
+
+def load_token(path=TOKEN_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+class Musiking(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None, cluster_id=None):
+        self._cogs = [p.stem for p in COGS_PATH.glob("*.py")]
+        self.cluster_id = cluster_id
+        self.started_at = time.perf_counter()
+        self.timings = {}
+        self.logged_in = asyncio.Event()
+        super().__init__(
+            command_prefix=self.prefix,
+            case_insensitive=True,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+        )
+
+    def mark(self, phase, started):
+        self.timings[phase] = time.perf_counter() - started
+
+        if all(p in self.timings for p in STARTUP_PHASES) and "total" not in self.timings:
+            self.timings["total"] = time.perf_counter() - self.started_at
+            print("Startup: " + " | ".join(
+                f"{p} {self.timings[p]*1000:,.0f} ms" for p in (*STARTUP_PHASES, "total")))
 
     def setup(self):
         print("Running setup...")
+        started = time.perf_counter()
 
         for cog in self._cogs:
             self.load_extension(f"bot.cogs.{cog}")
             print(f" Loaded `{cog}` cog.")
 
+        self.mark("setup", started)
         print("Setup complete.")
 
+    async def login(self, token, *, bot=True):
+        started = time.perf_counter()
+        data = await self.http.static_login(token.strip(), bot=bot)
+        self._connection.is_bot = bot
+        # The Lavalink handshake only needs the bot's user id, so publish it
+        # now and let nodes connect while the gateway is still identifying.
+        self._connection.user = discord.ClientUser(state=self._connection, data=data)
+        self.mark("login", started)
+        self.gateway_started = time.perf_counter()
+        self.logged_in.set()
+
     def run(self):
         self.setup()
 
-        with open("data/token.0", "r", encoding="utf-8") as f:
-            TOKEN = f.read()
+        TOKEN = load_token()
+
+        if self.cluster_id is None:
+            print("Running bot...")
+        else:
+            print(f"Running bot (cluster {self.cluster_id}, shards {self.shard_ids})...")
 
-        print("Running bot...")
         super().run(TOKEN, reconnect=True)
 
     async def shutdown(self):
@@ -37,6 +82,9 @@ class Musiking(commands.Bot):
     async def on_connect(self):
         print(f" Connected to Discord (latency: {self.latency*1000:,.0f} ms).")
 
+    async def on_shard_ready(self, shard_id):
+        print(f" Shard {shard_id} ready.")
+
     async def on_resumed(self):
         print("Bot resumed.")
 
@@ -50,6 +98,9 @@ class Musiking(commands.Bot):
         raise getattr(exc, "original", exc)
 
     async def on_ready(self):
+        if "gateway" not in self.timings:
+            self.mark("gateway", self.gateway_started)
+
         self.client_id = (await self.application_info()).id
         print("Bot ready.")
 
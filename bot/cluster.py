@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import signal
+import time
+
+from discord.http import HTTPClient
+
+from .bot import Musiking, load_token
+
+# Discord allows one IDENTIFY every 5 seconds per bot, so workers are
+# started far enough apart that their shards never compete for it.
+IDENTIFY_INTERVAL = 5.0
+RESTART_BACKOFF = (1, 5, 15, 60)
+STABLE_AFTER = 300
+
+
+def shard_ranges(shard_count, workers):
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+
+    for i in range(workers):
+        stop = start + size + (i < extra)
+        ranges.append(list(range(start, stop)))
+        start = stop
+
+    return [r for r in ranges if r]
+
+
+async def _recommended_shards(token):
+    http = HTTPClient()
+
+    try:
+        await http.static_login(token, bot=True)
+        shards, _ = await http.get_bot_gateway()
+        return shards
+    finally:
+        await http.close()
+
+
+def recommended_shards():
+    return asyncio.run(_recommended_shards(load_token()))
+
+
+def run_worker(cluster_id, shard_ids, shard_count):
+    # Let the launcher decide when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    Musiking(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id).run()
+
+
+class Worker:
+    def __init__(self, ctx, cluster_id, shard_ids, shard_count):
+        self.ctx = ctx
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = None
+
+    def start(self):
+        self.process = self.ctx.Process(
+            target=run_worker,
+            args=(self.cluster_id, self.shard_ids, self.shard_count),
+            name=f"musiking-cluster-{self.cluster_id}",
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        print(f"Started cluster {self.cluster_id} (pid {self.process.pid}, shards {self.shard_ids}).")
+
+    def check(self):
+        if self.restart_at is not None:
+            if time.monotonic() >= self.restart_at:
+                self.start()
+            return
+
+        if self.process.is_alive():
+            return
+
+        if time.monotonic() - self.started_at > STABLE_AFTER:
+            self.failures = 0
+
+        delay = RESTART_BACKOFF[min(self.failures, len(RESTART_BACKOFF) - 1)]
+        self.failures += 1
+        self.restart_at = time.monotonic() + delay
+        print(f"Cluster {self.cluster_id} exited with code {self.process.exitcode}, "
+              f"restarting in {delay}s.")
+
+    def stop(self, timeout=10.0):
+        if self.process is None or not self.process.is_alive():
+            return
+
+        self.process.terminate()
+        self.process.join(timeout)
+
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class Cluster:
+    def __init__(self, workers, shard_count=None):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.shard_count = shard_count or recommended_shards()
+        self.workers = [
+            Worker(self.ctx, i, shard_ids, self.shard_count)
+            for i, shard_ids in enumerate(shard_ranges(self.shard_count, workers))
+        ]
+        self._stopping = False
+
+    def _stop(self, *args):
+        self._stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        print(f"Running {len(self.workers)} clusters over {self.shard_count} shards...")
+
+        try:
+            for worker in self.workers:
+                if self._stopping:
+                    break
+
+                worker.start()
+                time.sleep(IDENTIFY_INTERVAL * len(worker.shard_ids))
+
+            while not self._stopping:
+                for worker in self.workers:
+                    worker.check()
+
+                time.sleep(1)
+        finally:
+            print("Stopping clusters...")
+
+            for worker in self.workers:
+                worker.stop()
@@ -1,20 +1,100 @@
 import asyncio
 import datetime as dt
+import os
 import random
 import re
+import time
 import typing as t
+from collections import defaultdict, deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from functools import partial
 
 import aiohttp
 import discord
 import wavelink
 from discord.ext import commands
 
-URL_REGEX = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
+from ..utils import (CompactTrack, FilterState, LivePanel, Mailbox, MetricsServer, NodePool, Outbox, PrefixSums,
+                     Priority, Registry, RequestBudget, RollingStats, SearchIndex, SingleFlight, SpillList, StateStore,
+                     TrackCache, TrackDecodeError, TransitionIndex, TTLCache, classify, decode_track, load_nodes,
+                     normalize_query, VoiceOccupancy, shuffle_tail, watch_loop_lag)
+
 LYRICS_URL = 'https://some-random-api.ml/lyrics?title='
 HZ_BANDS = (20, 40, 63, 100, 150, 250, 400, 450, 630,
             1000, 1600, 2500, 4000, 10000, 16000)
 TIME_REGEX = r'([0-9]{1,2})[:ms](([0-9]{1,2})s?)?'
+TRACK_CACHE_SIZE = 4096
+TRACK_CACHE_TTL = 6 * 60 * 60
+TRACK_CACHE_PATH = 'data/tracks.sqlite3'
+TRACK_LOOKUP_TIMEOUT = 15.0
+NODES_PATH = 'config/nodes.json'
+PLAYLIST_CHUNK_SIZE = 50
+STATE_PATH = 'data/state'
+SNAPSHOT_INTERVAL = 30
+RESTORE_CONCURRENCY = 8
+LYRICS_CACHE_SIZE = 512
+LYRICS_CACHE_TTL = 24 * 60 * 60
+LYRICS_MISS_TTL = 10 * 60
+LYRICS_CONNECTIONS = 8
+LYRICS_PREFETCH = False
+LOOKAHEAD_DEPTH = 3
+DEAD_TRACK_TTL = 60 * 60
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9808
+LOOP_LAG_INTERVAL = 0.5
+BATCH_MAX_QUERIES = 50
+BATCH_FILE_SIZE = 64 * 1024
+BATCH_CONCURRENCY = 16
+BATCH_GUILD_CONCURRENCY = 4
+FILTER_DEBOUNCE = 0.3
+AUTO_LEAVE_DELAY = 60
+NODE_READY_TIMEOUT = 10.0
+HISTORY_SIZE = 200
+HISTORY_SPILL_BATCH = 50
+HISTORY_DISK_SIZE = 10_000
+HISTORY_DROP_BATCH = 1000
+QUEUE_PAGE_SIZE = 10
+QUEUE_BROWSE_TIMEOUT = 120.0
+SEARCH_INDEX_PATH = 'data/search.sqlite3'
+SEARCH_INDEX_SIZE = 200_000
+SEARCH_MIN_COVERAGE = 0.6
+SEARCH_INDEX_BATCH = 100
+AUTOPLAY_PATH = 'data/autoplay.sqlite3'
+AUTOPLAY_POOL_SIZE = 5
+AUTOPLAY_LOW_WATER = 2
+AUTOPLAY_RECENT = 50
+AUTOPLAY_NODE_RATE = 0.5
+AUTOPLAY_NODE_BURST = 5
+PANEL_EDIT_INTERVAL = 3.0
+PANEL_DRIFT = 3
+# Discord allows about 5 messages per 5 s in a channel and 50 requests a
+# second overall; reactions have their own bucket.
+OUTBOX_RATE = 1.0
+OUTBOX_BURST = 5
+OUTBOX_REACTION_RATE = 4.0
+OUTBOX_GLOBAL_RATE = 50.0
+OUTBOX_MAX_DEPTH = 10
+OUTBOX_STALE_AFTER = 15.0
+# Lavalink reports streams as lasting 2**63 - 1 ms.
+MAX_TRACK_LENGTH = 24 * 60 * 60 * 1000
+EQ_PRESETS = {
+    name: getattr(wavelink.eqs.Equalizer, name)()
+    for name in ('flat', 'boost', 'metal', 'piano')
+}
+MISSING = object()
+# Track ends Lavalink reports for stops we caused ourselves, and for a load
+# failure, whose TrackException already advanced. Keyed on the track alone,
+# that end would advance again when the next entry is the same track.
+NO_ADVANCE_REASONS = ('REPLACED', 'STOPPED', 'CLEANUP', 'LOAD_FAILED')
+REPEAT_LABELS = ('desligada', 'faixa', 'fila')
+PAGE_BUTTONS = {
+    '⏮️': lambda page, pages: 0,
+    '◀️': lambda page, pages: page - 1,
+    '▶️': lambda page, pages: page + 1,
+    '⏭️': lambda page, pages: pages - 1,
+}
 OPTIONS = {
     '1️⃣': 0,
     '2⃣': 1,
@@ -40,6 +120,10 @@ class NoTracksFound(commands.CommandError):
     pass
 
 
+class TrackLookupTimeout(commands.CommandError):
+    pass
+
+
 class PlayerIsAlreadyPaused(commands.CommandError):
     pass
 
@@ -98,11 +182,63 @@ class RepeatMode(Enum):
     ALL = 2
 
 
+class QueueView(Sequence):
+    __slots__ = ('_items', '_start', '_stop')
+
+    def __init__(self, items, start, stop=None):
+        self._items = items
+        self._start = max(start, 0)
+        self._stop = stop
+
+    def _range(self):
+        return range(self._start, self._start + len(self))
+
+    def __len__(self):
+        stop = len(self._items)
+        if self._stop is not None and self._stop < stop:
+            stop = self._stop
+        return stop - self._start if stop > self._start else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if (window := self._range()[index]).step == 1:
+                return self._items[window.start:window.stop]
+            return [self._items[i] for i in window]
+
+        return self._items[self._range()[index]]
+
+    def __iter__(self):
+        window = self._range()
+        return self._items.iterate(window.start, window.stop)
+
+
 class Queue:
-    def __init__(self):
-        self._queue = []
+    def __init__(self, history_path=None, history_size=HISTORY_SIZE, history_limit=HISTORY_DISK_SIZE):
+        # Played tracks past `history_size` are kept on disk; indexes and
+        # `position` still count them. Past `history_limit` on disk the
+        # oldest are forgotten.
+        self._queue = SpillList(history_path, CompactTrack.load, CompactTrack.dump)
+        self.history_size = history_size
+        self.history_limit = history_limit
+        self.lengths = PrefixSums()
+        # Bumped on every change, so anything rendered from the queue knows
+        # when it is stale.
+        self.version = 0
         self.position = 0
         self.repeat_mode = RepeatMode.NONE
+        self.listener = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __iter__(self):
+        return iter(self._queue)
+
+    def _notify(self, op, **data):
+        self.version += 1
+
+        if self.listener is not None:
+            self.listener(op, **data)
 
     @property
     def is_empty(self):
@@ -121,21 +257,65 @@ class Queue:
         if not self._queue:
             raise QueueIsEmpty
 
-        return self._queue[self.position + 1:]
+        return QueueView(self._queue, self.position + 1)
 
     @property
     def history(self):
         if not self._queue:
             raise QueueIsEmpty
 
-        return self._queue[:self.position]
+        return QueueView(self._queue, 0, self.position)
 
     @property
     def length(self):
         return len(self._queue)
 
+    @property
+    def spilled(self):
+        return self._queue.offset
+
+    @property
+    def resident(self):
+        return QueueView(self._queue, self.spilled)
+
+    @property
+    def pages(self):
+        upcoming = max(len(self._queue) - self.position - 1, 0)
+        return max(-(-upcoming // QUEUE_PAGE_SIZE), 1)
+
+    @property
+    def remaining(self):
+        return self.lengths.sum(self.position + 1)
+
+    def time_until(self, index):
+        # Playing time between the end of the current track and `index`.
+        return self.lengths.sum(self.position + 1, index)
+
+    def footprint(self):
+        return self._queue.footprint()
+
+    def _trim(self):
+        # Spilling in batches keeps the list from shifting on every track.
+        # A skip can leave `position` past the end, beyond anything resident.
+        extra = min(self.position - self.spilled - self.history_size, len(self._queue.items))
+
+        if extra >= HISTORY_SPILL_BATCH:
+            self._notify('spill', n=self._queue.spill(extra))
+
+            # Repeat-all comes back around to the oldest tracks, so they stay.
+            if self.repeat_mode != RepeatMode.ALL and self.spilled - self.history_limit >= HISTORY_DROP_BATCH:
+                self._drop(self.spilled - self.history_limit)
+
+    def _drop(self, count):
+        count = self._queue.drop(count)
+        self.lengths.drop(count)
+        self.position -= count
+        self._notify('drop', n=count)
+
     def add(self, *args):
         self._queue.extend(args)
+        self.lengths.extend(map(track_length, args))
+        self._notify('add', tracks=args)
 
     def get_next_track(self):
         if not self._queue:
@@ -143,24 +323,53 @@ class Queue:
 
         self.position += 1
 
-        if self.position < 0:
-            return None
-        elif self.position > len(self._queue) - 1:
-            if self.repeat_mode == RepeatMode.ALL:
-                self.position = 0
-            else:
-                return None
+        if self.position > len(self._queue) - 1 and self.repeat_mode == RepeatMode.ALL:
+            self.position = 0
+
+        self._notify('position', v=self.position)
+        self._trim()
+
+        if 0 <= self.position <= len(self._queue) - 1:
+            return self._queue[self.position]
+
+    def replace(self, index, old, new):
+        # The queue may have moved while `new` was being resolved.
+        if not (self.spilled <= index < len(self._queue) and self._queue[index] is old):
+            try:
+                index = self._queue.index(old, max(self.position + 1, 0))
+            except ValueError:
+                return False
+
+        if new is None:
+            del self._queue[index]
+            self.lengths.delete(index)
+            self._notify('del_track', index=index)
+        else:
+            self._queue[index] = new
+            self.lengths.set(index, track_length(new))
+            self._notify('set_track', index=index, track=new)
+
+        return True
 
-        return self._queue[self.position]
+    def skip_to(self, index):
+        # The next get_next_track() call lands on `index`.
+        self.position = index - 1
+        self._notify('position', v=self.position)
 
     def shuffle(self):
         if not self._queue:
             raise QueueIsEmpty
 
-        upcoming = self.upcoming
-        random.shuffle(upcoming)
-        self._queue = self._queue[:self.position + 1]
-        self._queue.extend(upcoming)
+        # Seeded so the journal can replay the exact same order.
+        seed = random.getrandbits(32)
+        # After repeat-all wraps around, spilled tracks keep their order; a
+        # finished queue has nothing left to shuffle.
+        start = min(max(self.position + 1, self.spilled), len(self._queue))
+        # `start` is never spilled, so this works on the resident list itself.
+        resident = self._queue.items
+        shuffle_tail(resident, start - self.spilled, seed)
+        self.lengths.rewrite(start, map(track_length, resident[start - self.spilled:]))
+        self._notify('shuffle', start=start, seed=seed)
 
     def set_repeat_mode(self, mode):
         if mode == 'none':
@@ -170,16 +379,311 @@ class Queue:
         elif mode == 'all':
             self.repeat_mode = RepeatMode.ALL
 
+        self._notify('repeat_mode', v=self.repeat_mode.value)
+
     def empty(self):
         self._queue.clear()
+        self.lengths.clear()
         self.position = 0
+        self._notify('empty')
+
+    def restore(self, tracks, position, spilled=0):
+        if self._queue.reopen(spilled):
+            self.lengths.extend(map(track_length, self._queue.iterate(0, spilled)))
+        else:
+            # The spilled history is gone, keep what was still in memory.
+            position = max(position - spilled, 0)
+
+        self._queue.extend(tracks)
+        self.lengths.extend(map(track_length, tracks))
+        self.position = position
+        self.version += 1
+
+    def close(self):
+        self._queue.clear()
+
+
+def choice_embed(author, tracks):
+    embed = discord.Embed(
+        title='Escolha uma música',
+        description=(
+            '\n'.join(
+                f'**{i+1}.** {t.title} ({t.length//60000}:{str(t.length%60).zfill(2)})'
+                for i, t in enumerate(tracks[:5])
+            )
+        ),
+        colour=author.colour,
+        timestamp=dt.datetime.utcnow()
+    )
+    embed.set_author(name='Resultados da Query')
+    embed.set_footer(text=f'Solicitado por {author.display_name}', icon_url=author.avatar_url)
+    return embed
+
+
+def queue_page(queue, page, left, now=None):
+    # `left` is what is left of the current track. Given `now`, the ETAs
+    # are Discord timestamps that the client keeps counting down; without
+    # it the player is paused and they are plain offsets.
+    start = queue.position + 1 + page * QUEUE_PAGE_SIZE
+    lines = [
+        f'Página {page + 1}/{queue.pages} · {len(queue.upcoming)} faixas, '
+        f'{format_duration(left + queue.remaining)} restantes',
+        '',
+    ]
+
+    for i, track in enumerate(queue.upcoming[page * QUEUE_PAGE_SIZE:(page + 1) * QUEUE_PAGE_SIZE], start):
+        eta = left + queue.time_until(i)
+        when = f'<t:{int(now + eta / 1000)}:R>' if now is not None else f'em {format_duration(eta)}'
+        lines.append(f'**{i + 1}.** {track.title} ({format_duration(track_length(track))}) · {when}')
+
+    return '\n'.join(lines)
+
+
+def queue_embed(author, queue, description):
+    embed = discord.Embed(
+        title='Queue',
+        description=description,
+        colour=author.colour,
+        timestamp=dt.datetime.utcnow()
+    )
+    embed.set_author(name='Resultados')
+    embed.set_footer(text=f'Solicitado por {author.display_name}', icon_url=author.avatar_url)
+    embed.add_field(
+        name='Tocando atualmente',
+        value=getattr(queue.current_track, 'title', 'Nenhuma faixa tocando atualmente.'),
+        inline=False
+    )
+    return embed
+
+
+def now_playing_embed(state):
+    title, author, uri, length, progress, up_next, upcoming, remaining, repeat, volume, autoplay, note = state
+    embed = discord.Embed(title='Tocando agora', url=uri or discord.Embed.Empty)
+
+    if title is None:
+        lines = ['Nenhuma faixa tocando no momento.']
+    else:
+        lines = [f'**{title}**', author]
+
+        if not length:
+            lines.append('Ao vivo')
+        elif progress[0] == 'paused':
+            lines.append(f'Pausado em {format_duration(progress[1] * 1000)}/{format_duration(length)}')
+        else:
+            # The client counts this down, so it stays current without edits.
+            lines.append(f'{format_duration(length)} · termina <t:{progress[1] + length // 1000}:R>')
+
+    if note:
+        lines += ['', note]
+
+    embed.description = '\n'.join(lines)
+    embed.add_field(name='Próxima', value=up_next or 'Nada na fila', inline=True)
+    embed.add_field(name='Fila', value=f'{upcoming} faixas · {format_duration(remaining)}', inline=True)
+    autoplay = 'ligado' if autoplay else 'desligado'
+    embed.set_footer(text=f'Repetição: {REPEAT_LABELS[repeat]} · Volume: {volume}% · Autoplay: {autoplay}')
+    return embed
+
+
+def split_queries(text):
+    queries = (q.strip().strip('<>').strip() for q in re.split(r'[|\n]', text))
+    return [q for q in queries if q]
+
+
+def report_index_failure(fut):
+    if (exc := fut.exception()) is not None:
+        print(f' Search index update failed: {exc!r}')
+
+
+def track_length(track):
+    return track.length if track.length < MAX_TRACK_LENGTH else 0
+
+
+def format_duration(ms):
+    minutes, seconds = divmod(int(ms) // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    if hours:
+        return f'{hours}:{minutes:02}:{seconds:02}'
+
+    return f'{minutes}:{seconds:02}'
+
+
+def custom_equalizer(levels):
+    return wavelink.eqs.Equalizer(levels=list(enumerate(levels)))
 
 
 class Player(wavelink.Player):
     def __init__(self, *args, **kwargs):
+        self.journal = kwargs.pop('journal', None)
+        self.outbox = kwargs.pop('outbox', None)
         super().__init__(*args, **kwargs)
-        self.queue = Queue()
+        self.panel = LivePanel(self.panel_state, now_playing_embed, PANEL_EDIT_INTERVAL, self._send_panel)
+        self.note = None
+        self._anchor = None
+        self.queue = Queue(self.journal and self.journal.history_path(self.guild_id))
+        self.queue.listener = self._log
         self.eq_levels = [0.] * 15
+        self._pending = deque()
+        self._ingest_task = None
+        self.ended_at = None
+        self.lookup_limit = asyncio.Semaphore(BATCH_GUILD_CONCURRENCY)
+        self.filters = FilterState(self._apply_filters, FILTER_DEBOUNCE)
+        self.mailbox = Mailbox(self.guild_id)
+        self.playing_id = None
+        self._pages = {}
+        self._pages_version = None
+        self.autoplay = False
+        self.candidates = deque()
+        self.last_started = None
+        self._refill = None
+
+    def _log(self, op, **data):
+        self.panel.refresh()
+
+        if self.journal is None:
+            return
+
+        if op == 'add':
+            data['tracks'] = [t.dump() for t in data['tracks']]
+        elif op == 'set_track':
+            data['track'] = data['track'].dump()
+
+        self.journal.log(self.guild_id, op, **data)
+
+    def snapshot(self):
+        return {
+            'channel_id': self.channel_id,
+            'tracks': [t.dump() for t in self.queue.resident],
+            'spilled': self.queue.spilled,
+            'position': self.queue.position,
+            'repeat_mode': self.queue.repeat_mode.value,
+            'volume': self.volume,
+            'equalizer': [self.equalizer.name, self.equalizer.raw],
+            'eq_levels': self.eq_levels,
+            'offset': int(self.position),
+            'paused': self.paused,
+            'autoplay': self.autoplay,
+        }
+
+    async def restore(self, channel, record):
+        self.queue.restore(
+            list(map(CompactTrack.load, record['tracks'])), record['position'], record.get('spilled', 0))
+        self.queue.repeat_mode = RepeatMode(record['repeat_mode'])
+        self.eq_levels = record['eq_levels']
+        self.autoplay = record.get('autoplay', False)
+
+        await super().connect(channel.id)
+
+        if record['volume'] != 100:
+            await self.set_volume(record['volume'])
+
+        if (eq := record['equalizer']) is not None:
+            name, levels = eq
+            await self.set_eq(wavelink.eqs.Equalizer(levels=[tuple(l) for l in levels], name=name))
+
+        if self.queue.length and (track := self.queue.current_track) is not None:
+            await self.play(track, start=record['offset'])
+
+            if record['paused']:
+                await self.set_pause(True)
+
+    async def set_volume(self, vol):
+        await super().set_volume(vol)
+        self._log('volume', v=self.volume)
+
+    async def set_eq(self, equalizer):
+        await super().set_eq(equalizer)
+        self._log('eq', equalizer=[equalizer.name, equalizer.raw], eq_levels=self.eq_levels)
+
+    async def set_pause(self, pause):
+        await super().set_pause(pause)
+        self._pages.clear()
+        self._log('paused', v=pause)
+
+    def set_autoplay(self, enabled):
+        self.autoplay = enabled
+
+        if not enabled:
+            self.candidates.clear()
+
+            if self._refill is not None:
+                self._refill.cancel()
+
+        self._log('autoplay', v=enabled)
+
+    async def seek(self, position=0):
+        await super().seek(position)
+        # Lavalink only confirms the new position on its next update.
+        self.last_position, self.last_update = position, time.time() * 1000
+        self._pages.clear()
+        self.panel.refresh()
+
+    def queue_page(self, page):
+        # Rendered pages hold until the queue changes or playback jumps.
+        if self._pages_version != self.queue.version:
+            self._pages.clear()
+            self._pages_version = self.queue.version
+
+        if (text := self._pages.get(page)) is None:
+            left = 0
+
+            if self.is_playing and (track := self.queue.current_track) is not None:
+                left = max(track_length(track) - self.position, 0)
+
+            now = None if self.is_paused else time.time()
+            text = self._pages[page] = queue_page(self.queue, page, left, now)
+
+        return text
+
+    def panel_state(self):
+        track = progress = up_next = None
+
+        if self.playing_id is not None and not self.queue.is_empty:
+            track = self.queue.current_track
+
+        if track is not None and self.is_paused:
+            progress = ('paused', int(self.position) // 1000)
+        elif track is not None:
+            # When the track would have started, going by its position now.
+            # Lavalink's updates jitter it a little, which is not worth an edit.
+            anchor = int(time.time() - self.position / 1000)
+            if self._anchor is None or abs(anchor - self._anchor) > PANEL_DRIFT:
+                self._anchor = anchor
+            progress = ('playing', self._anchor)
+
+        upcoming = self.queue.upcoming if not self.queue.is_empty else ()
+        if upcoming:
+            up_next = upcoming[0].title
+
+        return (
+            getattr(track, 'title', None), getattr(track, 'author', None), getattr(track, 'uri', None),
+            track and track_length(track), progress, up_next, len(upcoming), self.queue.remaining,
+            self.queue.repeat_mode.value, self.volume, self.autoplay, self.note,
+        )
+
+    async def _send_panel(self, destination, embed):
+        return await self.outbox.send(destination, embed=embed, priority=Priority.REPLY)
+
+    async def announce(self, ctx, text):
+        # Replies to playback commands go on the panel instead of each being
+        # a new message. The panel follows whichever channel is in use.
+        self.note = text
+
+        if self.panel.channel_id == ctx.channel.id:
+            self.panel.refresh()
+        else:
+            await self.panel.show(ctx)
+
+    @property
+    def target_volume(self):
+        return self.filters.get('volume', self.volume)
+
+    async def _apply_filters(self, volume=None, equalizer=None):
+        if volume is not None and volume != self.volume:
+            await self.set_volume(volume)
+
+        if equalizer is not None and equalizer.raw != self.equalizer.raw:
+            await self.set_eq(equalizer)
 
     async def connect(self, ctx, channel=None):
         if self.is_connected:
@@ -189,31 +693,118 @@ class Player(wavelink.Player):
             raise NoVoiceChannel
 
         await super().connect(channel.id)
+        self._log('channel_id', v=channel.id)
         return channel
 
     async def teardown(self):
+        self.cancel_ingest()
+        self.filters.cancel()
+        self.mailbox.close()
+        self.queue.close()
+
+        if self._refill is not None:
+            self._refill.cancel()
+
+        await self.panel.close()
+        self._log('remove')
+
         try:
             await self.destroy()
         except KeyError:
             pass
 
+    def enqueue(self, *tracks):
+        # Tracks added while a playlist is still streaming in go behind it.
+        tracks = [CompactTrack.from_track(t) for t in tracks]
+
+        if self._pending:
+            self._pending.append(tracks)
+        else:
+            self.queue.add(*tracks)
+
+    def ingest(self, tracks):
+        if tracks:
+            self._pending.append(tracks)
+
+        if self._pending and (self._ingest_task is None or self._ingest_task.done()):
+            self._ingest_task = asyncio.ensure_future(self._ingest())
+
+    def cancel_ingest(self):
+        self._pending.clear()
+
+        if self._ingest_task is not None:
+            self._ingest_task.cancel()
+            self._ingest_task = None
+
+    async def _ingest(self):
+        while self._pending:
+            tracks = self._pending[0]
+
+            for i in range(0, len(tracks), PLAYLIST_CHUNK_SIZE):
+                self.queue.add(*map(CompactTrack.from_track, tracks[i:i + PLAYLIST_CHUNK_SIZE]))
+                # Hand the loop back between chunks so big playlists never
+                # stall other guilds.
+                await asyncio.sleep(0)
+
+            self._pending.popleft()
+
     async def add_tracks(self, ctx, tracks):
         if not tracks:
             raise NoTracksFound
 
+        note = None
+
         if isinstance(tracks, wavelink.TrackPlaylist):
-            self.queue.add(*tracks.tracks)
+            self.enqueue(tracks.tracks[0])
+            self.ingest(tracks.tracks[1:])
+            note = f'Adicionei {len(tracks.tracks)} músicas na fila.'
         elif len(tracks) == 1:
-            self.queue.add(tracks[0])
-            await ctx.send(f'Adicionei {tracks[0].title} na fila.')
+            self.enqueue(tracks[0])
+            note = f'Adicionei {tracks[0].title} na fila.'
         else:
             if (track := await self.choose_track(ctx, tracks)) is not None:
-                self.queue.add(track)
-                await ctx.send(f'Adicionei {track.title} na fila.')
+                self.enqueue(track)
+                note = f'Adicionei {track.title} na fila.'
 
         if not self.is_playing and not self.queue.is_empty:
             await self.start_playback()
 
+        if note is not None:
+            await self.announce(ctx, note)
+
+    async def add_batch(self, ctx, queries, results, ignored=0):
+        added, missing, failed = 0, [], []
+
+        for query, tracks in zip(queries, results):
+            if isinstance(tracks, Exception):
+                failed.append(query)
+            elif isinstance(tracks, wavelink.TrackPlaylist):
+                self.enqueue(tracks.tracks[0])
+                self.ingest(tracks.tracks[1:])
+                added += len(tracks.tracks)
+            elif tracks:
+                self.enqueue(tracks[0])
+                added += 1
+            else:
+                missing.append(query)
+
+        if not added:
+            raise NoTracksFound
+
+        msg = f'Adicionei {added} músicas na fila.'
+        if ignored:
+            msg += f' Ignorei {ignored} buscas além do limite de {BATCH_MAX_QUERIES}.'
+        if missing:
+            msg += f' Não encontrei: {", ".join(missing)}.'
+        if failed:
+            msg += f' Falha ao buscar: {", ".join(failed)}.'
+        msg = msg[:1900]
+
+        if not self.is_playing and not self.queue.is_empty:
+            await self.start_playback()
+
+        await self.announce(ctx, msg)
+
     async def choose_track(self, ctx, tracks):
         def _check(r, u):
             return (
@@ -222,24 +813,13 @@ class Player(wavelink.Player):
                 and r.message.id == msg.id
             )
 
-        embed = discord.Embed(
-            title='Escolha uma música',
-            description=(
-                '\n'.join(
-                    f'**{i+1}.** {t.title} ({t.length//60000}:{str(t.length%60).zfill(2)})'
-                    for i, t in enumerate(tracks[:5])
-                )
-            ),
-            colour=ctx.author.colour,
-            timestamp=dt.datetime.utcnow()
-        )
-        embed.set_author(name='Resultados da Query')
-        embed.set_footer(
-            text=f'Solicitado por {ctx.author.display_name}', icon_url=ctx.author.avatar_url)
+        # The menu and its buttons go ahead of anything merely informational
+        # waiting on the channel, and the buttons are not awaited one by one.
+        if (msg := await self.outbox.send(ctx, embed=choice_embed(ctx.author, tracks),
+                                          priority=Priority.INTERACTIVE)) is None:
+            return
 
-        msg = await ctx.send(embed=embed)
-        for emoji in list(OPTIONS.keys())[:min(len(tracks), len(OPTIONS))]:
-            await msg.add_reaction(emoji)
+        buttons = [self.outbox.react(msg, emoji) for emoji in list(OPTIONS.keys())[:min(len(tracks), len(OPTIONS))]]
 
         try:
             reaction, _ = await self.bot.wait_for('reaction_add', timeout=60.0, check=_check)
@@ -249,17 +829,96 @@ class Player(wavelink.Player):
         else:
             await msg.delete()
             return tracks[OPTIONS[reaction.emoji]]
+        finally:
+            # Buttons still queued would land on a deleted menu.
+            for button in buttons:
+                button.cancel()
+
+    async def look_ahead(self, resolve, is_playable, depth=LOOKAHEAD_DEPTH):
+        base = self.queue.position + 1
+
+        for i, track in enumerate(self.queue.upcoming[:depth]):
+            if not is_playable(track):
+                self.queue.replace(base + i, track, await resolve(track))
+
+    async def play(self, track, **kwargs):
+        self.playing_id = track.id
+        self._pages.clear()
+        await super().play(track, **kwargs)
+        self.panel.refresh()
 
     async def start_playback(self):
-        await self.play(self.queue.current_track)
+        await self.mailbox.post(self._start_playback)
+
+    async def _start_playback(self):
+        # Two plays racing each other both saw an idle player; only the
+        # first one in the mailbox gets to start it.
+        if not self.is_playing and (track := self.queue.current_track) is not None:
+            await self.play(track)
+
+    async def skip(self, offset=1, index=None):
+        self.queue.skip_to(self.queue.position + offset if index is None else index)
+        self.playing_id = None
+        await self.advance()
+
+        # Skipping past either end plays nothing, and the old track must not
+        # keep going under a position that no longer points at it.
+        if self.playing_id is None:
+            await self.stop()
+            self.panel.refresh()
+
+    async def halt(self):
+        self.cancel_ingest()
+        self.queue.empty()
+        self.playing_id = None
+        self.last_started = None
+        await self.stop()
+
+    async def handle_stop(self, payload):
+        # Lavalink reports one stop in several ways: an exception or a stuck
+        # track is followed by its end, and a skip ends the old track as
+        # REPLACED. Only the first event for the track we asked for counts.
+        if payload.track != self.playing_id or getattr(payload, 'reason', None) in NO_ADVANCE_REASONS:
+            self.mailbox.dropped += 1
+            return
+
+        self.playing_id = None
+        self.ended_at = time.perf_counter()
+        self.panel.refresh()
+
+        if self.queue.repeat_mode == RepeatMode.ONE:
+            await self.repeat_track()
+        else:
+            await self.advance()
 
     async def advance(self):
         try:
             if (track := self.queue.get_next_track()) is not None:
-                await self.play(track)
+                return await self.play(track)
         except QueueIsEmpty:
             pass
 
+        if self.autoplay and self.candidates:
+            return await self._play_candidate()
+
+        # Nothing follows, so there is no gap to measure.
+        self.ended_at = None
+
+    async def _play_candidate(self):
+        # The queue has run out, but a skip may have left `position` anywhere
+        # past its end, so it is moved onto the candidate.
+        self.queue.add(self.candidates.popleft())
+        self.queue.skip_to(len(self.queue) - 1)
+        await self.play(self.queue.get_next_track())
+
+    async def play_candidate(self):
+        # For a pool that filled up after the queue had already run out.
+        if self.is_playing or not self.candidates:
+            return
+
+        if self.queue.is_empty or self.queue.current_track is None:
+            await self._play_candidate()
+
     async def repeat_track(self):
         await self.play(self.queue.current_track)
 
@@ -268,75 +927,619 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
     def __init__(self, bot):
         self.bot = bot
         self.wavelink = wavelink.Client(bot=bot)
+        self.track_cache = TrackCache(TRACK_CACHE_SIZE, TRACK_CACHE_TTL, TRACK_CACHE_PATH)
+        self.lookups = SingleFlight()
+        self.batch_limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+        self.nodes = NodePool(self.wavelink, load_nodes(NODES_PATH))
+        # Cluster workers own different guilds, so each keeps its own state.
+        cluster_id = getattr(bot, 'cluster_id', None)
+        self.state = StateStore(
+            STATE_PATH if cluster_id is None else os.path.join(STATE_PATH, f'cluster-{cluster_id}'))
+        self._saved = self.state.load()
+        self._snapshots = None
+        self.lyrics_cache = TTLCache(LYRICS_CACHE_SIZE, LYRICS_CACHE_TTL)
+        self._session = None
+        self.dead_tracks = TTLCache(4096, DEAD_TRACK_TTL)
+        self.transitions = TransitionIndex(AUTOPLAY_PATH)
+        self.search_index = SearchIndex(SEARCH_INDEX_PATH, SEARCH_INDEX_SIZE, SEARCH_MIN_COVERAGE)
+        # Every use of the index runs on this one thread, in order, so sqlite
+        # never holds up the event loop.
+        self.index_worker = ThreadPoolExecutor(1, thread_name_prefix='musiking-index')
+        self.node_budget = RequestBudget(AUTOPLAY_NODE_RATE, AUTOPLAY_NODE_BURST)
+        self.outbox = Outbox(
+            OUTBOX_RATE, OUTBOX_BURST, OUTBOX_REACTION_RATE, OUTBOX_GLOBAL_RATE, OUTBOX_MAX_DEPTH, OUTBOX_STALE_AFTER)
+        self.track_gaps = RollingStats()
+        self.occupancy = VoiceOccupancy()
+        self.nodes_ready = asyncio.Event()
+        self._leave_timers = {}
+        self._browsers = set()
+        self.setup_metrics()
         self.bot.loop.create_task(self.start_nodes())
 
+    def cog_unload(self):
+        if self._snapshots is not None:
+            self._snapshots.cancel()
+
+        self.nodes.close()
+        self.track_cache.close()
+        self.transitions.close()
+        self.index_worker.shutdown()
+        self.search_index.close()
+        self.state.close()
+        self.outbox.close()
+
+        if self._session is not None:
+            self.bot.loop.create_task(self._session.close())
+
+        if self._loop_lag is not None:
+            self._loop_lag.cancel()
+
+        if self.metrics_server is not None:
+            self.bot.loop.create_task(self.metrics_server.close())
+
+        for timer in self._leave_timers.values():
+            timer.cancel()
+
+        for task in list(self._browsers):
+            task.cancel()
+
+    def setup_metrics(self):
+        self.metrics = Registry()
+        self.command_time = self.metrics.histogram(
+            'musiking_command_seconds', 'Time spent running each command.', ('command', 'status'))
+        self.lookup_time = self.metrics.histogram(
+            'musiking_get_tracks_seconds', 'Time Lavalink took to load tracks.', ('node',))
+        self.player_events = self.metrics.counter(
+            'musiking_player_events_total', 'Tracks that stopped playing, by event.', ('event', 'reason'))
+        self.gap_time = self.metrics.histogram(
+            'musiking_track_gap_seconds', 'Silence between one track ending and the next starting.')
+        self.loop_lag = self.metrics.histogram(
+            'musiking_event_loop_lag_seconds', 'How late the event loop woke up a sleeping task.')
+        self.players_gauge = self.metrics.gauge(
+            'musiking_players', 'Players by state.', ('state',))
+        self.queue_gauge = self.metrics.gauge(
+            'musiking_queue_tracks', 'Tracks across every queue.', ('kind',))
+        self.node_gauge = self.metrics.gauge(
+            'musiking_node_players', 'Players on each Lavalink node.', ('node',))
+        self.cache_counter = self.metrics.counter(
+            'musiking_track_cache_total', 'Track cache activity.', ('event',))
+        self.lookup_counter = self.metrics.counter(
+            'musiking_track_lookups_total', 'Lavalink lookups started or shared.', ('event',))
+        self.failover_counter = self.metrics.counter(
+            'musiking_node_failovers_total', 'Players moved off a failed node.')
+        self.queue_bytes = self.metrics.gauge(
+            'musiking_queue_bytes', 'Estimated size of the queues in memory and spilled to disk, per shard.',
+            ('shard', 'where'))
+        self.query_counter = self.metrics.counter(
+            'musiking_queries_total', 'Play queries by the source and kind they were routed to.', ('source', 'kind'))
+        self.search_counter = self.metrics.counter(
+            'musiking_search_index_total', 'Searches answered by the local index or passed on to Lavalink.', ('event',))
+        self.autoplay_gauge = self.metrics.gauge(
+            'musiking_autoplay', 'Players with autoplay on and the candidates they hold.', ('kind',))
+        self.autoplay_counter = self.metrics.counter(
+            'musiking_autoplay_events_total', 'Transitions recorded and lookups refused by the node budget.',
+            ('event',))
+        self.mailbox_depth = self.metrics.gauge(
+            'musiking_mailbox_depth', 'Actions waiting in player mailboxes, per shard.', ('shard',))
+        self.mailbox_latency = self.metrics.gauge(
+            'musiking_mailbox_latency_seconds', 'Time from posting an action to it finishing, worst player per shard.',
+            ('shard', 'quantile'))
+        self.mailbox_actions = self.metrics.gauge(
+            'musiking_mailbox_actions', 'Actions processed or dropped as redundant by live player mailboxes.',
+            ('event',))
+        self.panel_updates = self.metrics.gauge(
+            'musiking_panel_updates', 'Now-playing panel refreshes and the messages they cost, across live players.',
+            ('event',))
+        self.outbox_depth = self.metrics.gauge(
+            'musiking_outbox_depth', 'Messages waiting to be sent to Discord, by priority.', ('priority',))
+        self.outbox_latency = self.metrics.gauge(
+            'musiking_outbox_latency_seconds', 'Time from queueing a message to Discord accepting it.',
+            ('priority', 'quantile'))
+        self.outbox_counter = self.metrics.counter(
+            'musiking_outbox_messages_total', 'Outgoing messages sent, merged into a newer one, dropped or refused.',
+            ('event',))
+        self.metrics.collector(self.collect_metrics)
+        self.metrics_server = None
+        self._loop_lag = None
+
+        if METRICS_PORT is not None:
+            port = METRICS_PORT + (getattr(self.bot, 'cluster_id', None) or 0)
+            self.metrics_server = MetricsServer(self.metrics, METRICS_HOST, port)
+            self.bot.loop.create_task(self.start_metrics())
+
+    async def start_metrics(self):
+        self._loop_lag = self.bot.loop.create_task(watch_loop_lag(self.loop_lag, LOOP_LAG_INTERVAL))
+
+        try:
+            await self.metrics_server.start()
+        except OSError as exc:
+            print(f' Metrics endpoint unavailable: {exc!r}')
+            self.metrics_server = None
+        else:
+            print(f' Metrics on http://{METRICS_HOST}:{self.metrics_server.port}/metrics')
+
+    def collect_metrics(self):
+        players = [p for p in self.wavelink.players.values() if p.is_connected]
+        self.players_gauge.set(len(players), ('connected',))
+        self.players_gauge.set(sum(p.is_playing for p in players), ('playing',))
+        self.players_gauge.set(sum(p.is_paused for p in players), ('paused',))
+
+        lengths = [p.queue.length for p in players]
+        self.queue_gauge.set(sum(lengths), ('total',))
+        self.queue_gauge.set(max(lengths, default=0), ('largest',))
+        self.queue_gauge.set(sum(p.queue.spilled for p in players), ('spilled',))
+
+        # A label per guild would be a time series per guild; shards are few.
+        queue_bytes, depth, latency = defaultdict(int), defaultdict(int), defaultdict(float)
+        for p in players:
+            shard = (p.guild_id >> 22) % (self.bot.shard_count or 1)
+            footprint = p.queue.footprint()
+            queue_bytes[shard, 'memory'] += footprint['memory_bytes']
+            queue_bytes[shard, 'disk'] += footprint['disk_bytes']
+
+            stats = p.mailbox.stats
+            depth[shard,] += stats['depth']
+
+            if stats['processed']:
+                for q in ('p50', 'p95', 'max'):
+                    latency[shard, q] = max(latency[shard, q], stats['latency_ms'][q] / 1000)
+
+        for metric, values in ((self.queue_bytes, queue_bytes), (self.mailbox_depth, depth),
+                               (self.mailbox_latency, latency)):
+            metric.clear()
+
+            for labels, value in values.items():
+                metric.set(value, labels)
+
+        self.mailbox_actions.set(sum(p.mailbox.processed for p in players), ('processed',))
+        self.mailbox_actions.set(sum(p.mailbox.dropped for p in players), ('dropped',))
+
+        for event in ('requested', 'posted', 'edits', 'skipped'):
+            self.panel_updates.set(sum(p.panel.stats[event] for p in players), (event,))
+
+        self.node_gauge.clear()
+        for node in self.wavelink.nodes.values():
+            self.node_gauge.set(len(node.players), (node.identifier,))
+
+        for event in ('hits', 'misses', 'evictions', 'expirations', 'disk_hits'):
+            self.cache_counter.set(self.track_cache.stats.get(event, 0), (event,))
+
+        self.lookup_counter.set(self.lookups.started, ('started',))
+        self.lookup_counter.set(self.lookups.shared, ('shared',))
+        self.failover_counter.set(self.nodes.failovers)
+        self.search_counter.set(self.search_index.hits, ('hits',))
+        self.search_counter.set(self.search_index.misses, ('misses',))
+        self.autoplay_gauge.set(sum(p.autoplay for p in players), ('players',))
+        self.autoplay_gauge.set(sum(len(p.candidates) for p in players), ('candidates',))
+        self.autoplay_counter.set(self.transitions.recorded, ('recorded',))
+        self.autoplay_counter.set(self.node_budget.denied, ('denied',))
+
+        self.outbox_latency.clear()
+        for priority in Priority:
+            name = priority.name.lower()
+            self.outbox_depth.set(self.outbox.depth(priority), (name,))
+
+            if (summary := self.outbox.latency[priority].summary)['count']:
+                for q in ('p50', 'p95', 'max'):
+                    self.outbox_latency.set(summary[q] / 1000, (name, q))
+
+        for event in ('sent', 'coalesced', 'dropped', 'failed'):
+            self.outbox_counter.set(getattr(self.outbox, event), (event,))
+
+    async def cog_before_invoke(self, ctx):
+        ctx.started_at = time.perf_counter()
+
+    async def cog_after_invoke(self, ctx):
+        self.command_time.observe(
+            time.perf_counter() - ctx.started_at,
+            (ctx.command.qualified_name, 'error' if ctx.command_failed else 'ok'))
+
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
-        if not member.bot and after.channel is None:
-            if not [m for m in before.channel.members if not m.bot]:
-                await self.get_player(member.guild).teardown()
+        before_id = before.channel.id if before.channel is not None else None
+        after_id = after.channel.id if after.channel is not None else None
+
+        # Mute, deafen and stream toggles fire this too, without moving anyone.
+        if before_id == after_id:
+            return
+
+        guild_id = member.guild.id
+
+        if member.id == self.bot.user.id:
+            if after.channel is None:
+                self.occupancy.unwatch(guild_id)
+            else:
+                self.occupancy.watch(guild_id, after_id, after.channel.members)
+        elif not member.bot:
+            self.occupancy.move(before_id, after_id)
+        else:
+            return
+
+        if self.occupancy.listeners(guild_id) == 0:
+            self.schedule_leave(guild_id)
+        else:
+            self.cancel_leave(guild_id)
+
+    def schedule_leave(self, guild_id):
+        if guild_id not in self._leave_timers:
+            self._leave_timers[guild_id] = self.bot.loop.create_task(self.leave_later(guild_id))
+
+    def cancel_leave(self, guild_id):
+        if (timer := self._leave_timers.pop(guild_id, None)) is not None:
+            timer.cancel()
+
+    async def leave_later(self, guild_id):
+        if AUTO_LEAVE_DELAY:
+            await asyncio.sleep(AUTO_LEAVE_DELAY)
+
+        del self._leave_timers[guild_id]
+
+        if self.occupancy.listeners(guild_id) == 0 and (player := self.find_player(guild_id)):
+            await player.teardown()
+
+    def find_player(self, guild_id):
+        # Client.players builds a new dict of every player on each access.
+        for node in self.wavelink.nodes.values():
+            if (player := node.players.get(guild_id)) is not None:
+                return player
 
     @wavelink.WavelinkMixin.listener()
     async def on_node_ready(self, node):
         print(f' Wavelink node `{node.identifier}` ready.')
 
+    @wavelink.WavelinkMixin.listener()
+    async def on_track_start(self, node, payload):
+        if (ended_at := payload.player.ended_at) is not None:
+            gap = time.perf_counter() - ended_at
+            self.track_gaps.add(gap * 1000)
+            self.gap_time.observe(gap)
+            payload.player.ended_at = None
+
+        player = payload.player
+
+        if (track := player.current) is not None:
+            self.update_index(self.search_index.played, track)
+
+            if (prev := player.last_started) is not None and track.uri and prev.uri and prev.uri != track.uri:
+                self.transitions.record(player.guild_id, prev, track)
+
+            player.last_started = track
+
+        try:
+            await player.look_ahead(self.resolve_again, self.is_playable)
+        except QueueIsEmpty:
+            pass
+
+        self.schedule_refill(player)
+
+        if LYRICS_PREFETCH and (track := player.current) is not None:
+            try:
+                await self.get_lyrics(track.title)
+            except (aiohttp.ClientError, asyncio.TimeoutError, NoLyricsFound):
+                pass
+
     @wavelink.WavelinkMixin.listener('on_track_stuck')
     @wavelink.WavelinkMixin.listener('on_track_end')
     @wavelink.WavelinkMixin.listener('on_track_exception')
     async def on_player_stop(self, node, payload):
-        if payload.player.queue.repeat_mode == RepeatMode.ONE:
-            await payload.player.repeat_track()
-        else:
-            await payload.player.advance()
+        self.player_events.inc((type(payload).__name__, getattr(payload, 'reason', None) or ''))
+
+        if isinstance(payload, wavelink.TrackException):
+            self.dead_tracks.set(payload.track, True)
+
+            if (track := payload.player.current) is not None and track.id == payload.track:
+                self.update_index(self.search_index.discard, track.uri)
+
+        payload.player.mailbox.tell(payload.player.handle_stop, payload)
 
     async def cog_check(self, ctx):
         if isinstance(ctx.channel, discord.DMChannel):
-            await ctx.send('Comandos de música não estão disponíveis por DM.')
+            self.outbox.tell(ctx, 'Comandos de música não estão disponíveis por DM.')
+            return False
+
+        # Commands that arrive while the nodes are still connecting wait
+        # for them instead of failing.
+        try:
+            await asyncio.wait_for(self.nodes_ready.wait(), NODE_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.outbox.tell(ctx, 'O player ainda está iniciando, tente de novo em instantes.')
             return False
 
         return True
 
     async def start_nodes(self):
+        await self.bot.logged_in.wait()
+        started = time.perf_counter()
+        await self.nodes.connect(self.bot.logged_in)
+        self.bot.mark('nodes', started)
+        self.nodes_ready.set()
+
         await self.bot.wait_until_ready()
+        started = time.perf_counter()
+        await self.restore_players()
+        self.bot.mark('restore', started)
+        self._snapshots = self.bot.loop.create_task(self.snapshot_loop())
+
+    async def restore_players(self):
+        semaphore = asyncio.Semaphore(RESTORE_CONCURRENCY)
+
+        async def restore(guild_id, record):
+            async with semaphore:
+                if (guild := self.bot.get_guild(guild_id)) is None:
+                    return False
 
-        nodes = {
-            'MAIN': {
-                'host': '127.0.0.1',
-                'port': 2333,
-                'rest_uri': 'http://127.0.0.1:2333',
-                'password': 'youshallnotpass',
-                'identifier': 'MAIN',
-                'region': 'brazil',
-            }
+                if (channel := guild.get_channel(record['channel_id'])) is None:
+                    return False
+
+                await self.get_player(guild).restore(channel, record)
+                return True
+
+        # Restoring replays saved state, it must not be journaled again.
+        self.state.paused = True
+        try:
+            records, self._saved = self._saved, {}
+            results = await asyncio.gather(
+                *(restore(g, r) for g, r in records.items()), return_exceptions=True)
+        finally:
+            self.state.paused = False
+
+        for exc in (r for r in results if isinstance(r, Exception)):
+            print(f' Failed to restore a player: {exc!r}')
+
+        print(f' Restored {sum(r is True for r in results)}/{len(records)} players.')
+        await self.save_state()
+
+    async def save_state(self):
+        seq = self.state.seq
+        records = {
+            guild_id: player.snapshot()
+            for guild_id, player in self.wavelink.players.items()
+            if player.is_connected
         }
+        await self.bot.loop.run_in_executor(None, self.state.write_snapshot, records, seq)
+        self.state.compact(seq)
+
+    async def snapshot_loop(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+            try:
+                await self.save_state()
+            except Exception as exc:
+                print(f' Failed to save player state: {exc!r}')
+
+    async def get_tracks(self, query):
+        if (tracks := await self.track_cache.get(query)) is not None:
+            return tracks
+
+        return await self.fetch_tracks(query)
+
+    async def fetch_tracks(self, query):
+        try:
+            return await self.lookups.do(
+                normalize_query(query), partial(self.load_tracks, query), TRACK_LOOKUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise TrackLookupTimeout
+
+    async def load_tracks(self, query):
+        if (node := self.nodes.best_node()) is None:
+            raise wavelink.ZeroConnectedNodes
+
+        with self.lookup_time.time((node.identifier,)):
+            tracks = await node.get_tracks(query)
+
+        self.track_cache.put(query, tracks)
+        if tracks:
+            # About 50 us a track on the index's thread: only the head of a
+            # big playlist is worth it.
+            items = tracks.tracks if isinstance(tracks, wavelink.TrackPlaylist) else tracks
+            self.update_index(self.search_index.add, items[:SEARCH_INDEX_BATCH])
+        return tracks
+
+    def update_index(self, func, *args):
+        # Nobody waits on index writes, so failures are only logged.
+        self.index_worker.submit(func, *args).add_done_callback(report_index_failure)
+
+    async def find_tracks(self, query):
+        # Songs someone here already resolved come straight from the local
+        # index, without a search or a choice menu.
+        route = classify(query)
+        self.query_counter.inc((route.source, route.kind))
+
+        if route.source == 'search':
+            track = await self.bot.loop.run_in_executor(self.index_worker, self.search_index.best, query)
+
+            if track is not None and self.is_playable(track):
+                return [track]
+
+        return await self.get_tracks(route.identifier)
+
+    async def resolve_batch_query(self, player, query):
+        # The guild's own limit is taken first so one big batch waiting on
+        # it never sits on global slots other guilds could use.
+        async with player.lookup_limit, self.batch_limit:
+            # A failed line is handed back as its error so the rest of the
+            # batch still gets queued.
+            try:
+                return await self.find_tracks(query)
+            except (TrackLookupTimeout, wavelink.ZeroConnectedNodes, wavelink.BuildTrackError,
+                    aiohttp.ClientError) as exc:
+                print(f' Batch lookup failed for {query!r}: {exc!r}')
+                return exc
+
+    async def read_queries(self, ctx, query):
+        text = query or ''
+
+        for attachment in ctx.message.attachments:
+            if attachment.filename.endswith('.txt') and attachment.size <= BATCH_FILE_SIZE:
+                text += '\n' + (await attachment.read()).decode('utf-8', 'replace')
+
+        return split_queries(text)
+
+    def is_playable(self, track):
+        if track.id is None or self.dead_tracks.get(track.id):
+            return False
 
-        for node in nodes.values():
-            await self.wavelink.initiate_node(**node)
+        # Blobs that do not decode locally would fail on Lavalink too. The
+        # result is thrown away: `track.info` would keep it on CompactTrack.
+        try:
+            decode_track(track.id)
+        except TrackDecodeError:
+            return False
+
+        return True
+
+    def schedule_refill(self, player):
+        if not player.autoplay or len(player.candidates) >= AUTOPLAY_POOL_SIZE:
+            return
+
+        if player._refill is not None and not player._refill.done():
+            return
+
+        if player.queue.length - player.queue.position - 1 >= AUTOPLAY_LOW_WATER:
+            return
+
+        player._refill = self.bot.loop.create_task(self.refill_candidates(player))
+
+    async def refill_candidates(self, player):
+        if (seed := player.candidates[-1] if player.candidates else player.last_started) is None:
+            return
+
+        queue = player.queue
+        recent = {seed.uri, *(t.uri for t in player.candidates)}
+        if not queue.is_empty:
+            recent.update(t.uri for t in queue.history[-AUTOPLAY_RECENT:])
+            recent.update(t.uri for t in queue.upcoming[:AUTOPLAY_RECENT])
+
+        # Follow what this guild usually plays next; only when that runs out
+        # ask Lavalink, and only within the node's budget.
+        while len(player.candidates) < AUTOPLAY_POOL_SIZE:
+            tracks = map(CompactTrack.load, self.transitions.successors(player.guild_id, seed))
+            if (track := next((t for t in tracks if t.uri not in recent and self.is_playable(t)), None)) is None:
+                break
+
+            player.candidates.append(track)
+            recent.add(track.uri)
+            seed = track
+
+        if len(player.candidates) < AUTOPLAY_POOL_SIZE:
+            # Nobody awaits this task, so a failed lookup is only logged.
+            try:
+                related = await self.related_tracks(seed)
+            except (wavelink.BuildTrackError, aiohttp.ClientError) as exc:
+                print(f' Autoplay lookup failed: {exc!r}')
+                related = []
+
+            for track in related:
+                if track.uri not in recent and self.is_playable(track):
+                    player.candidates.append(track)
+                    recent.add(track.uri)
+
+                    if len(player.candidates) >= AUTOPLAY_POOL_SIZE:
+                        break
+
+        if player.candidates and not player.is_playing:
+            await player.mailbox.post(player.play_candidate)
+
+    async def related_tracks(self, seed):
+        try:
+            info = seed.info
+        except TrackDecodeError:
+            info = None
+
+        if info and info.get('sourceName') == 'youtube':
+            query = f'https://www.youtube.com/watch?v={info["identifier"]}&list=RD{info["identifier"]}'
+        else:
+            query = f'ytsearch:{seed.author}'
+
+        # Only a lookup that reaches Lavalink is charged to the node's budget.
+        if (tracks := await self.track_cache.get(query)) is None:
+            if (node := self.nodes.best_node()) is None or not self.node_budget.take(node.identifier):
+                return []
+
+            try:
+                tracks = await self.fetch_tracks(query)
+            except (TrackLookupTimeout, wavelink.ZeroConnectedNodes):
+                return []
+
+        if isinstance(tracks, wavelink.TrackPlaylist):
+            tracks = tracks.tracks
+
+        return [CompactTrack.from_track(t) for t in tracks or ()]
+
+    async def resolve_again(self, track):
+        query = track.uri or f'ytsearch:{track.author} {track.title}'
+
+        try:
+            tracks = await self.get_tracks(query)
+        except (TrackLookupTimeout, wavelink.ZeroConnectedNodes):
+            return None
+
+        if isinstance(tracks, wavelink.TrackPlaylist):
+            tracks = tracks.tracks
+
+        for candidate in tracks or ():
+            if candidate.id != track.id and not self.dead_tracks.get(candidate.id):
+                return CompactTrack.from_track(candidate)
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=LYRICS_CONNECTIONS, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+
+        return self._session
+
+    async def get_lyrics(self, name):
+        key = ' '.join(name.casefold().split())
+
+        if (data := self.lyrics_cache.get(key, MISSING)) is not MISSING:
+            return data
+
+        return await self.lookups.do(('lyrics', key), partial(self.load_lyrics, key, name))
+
+    async def load_lyrics(self, key, name):
+        async with self.session.get(LYRICS_URL + name) as r:
+            if r.status == 404:
+                data = None
+            elif not 200 <= r.status <= 299:
+                raise NoLyricsFound
+            elif 'lyrics' not in (data := await r.json()):
+                data = None
+
+        # Misses are cached too, but for a shorter time.
+        self.lyrics_cache.set(key, data, LYRICS_MISS_TTL if data is None else None)
+        return data
 
     def get_player(self, obj):
         if isinstance(obj, commands.Context):
-            return self.wavelink.get_player(obj.guild.id, cls=Player, context=obj)
+            return self.wavelink.get_player(
+                obj.guild.id, cls=Player, context=obj, journal=self.state, outbox=self.outbox,
+                node_id=self.nodes.node_id_for(obj.guild))
         elif isinstance(obj, discord.Guild):
-            return self.wavelink.get_player(obj.id, cls=Player)
+            return self.wavelink.get_player(
+                obj.id, cls=Player, journal=self.state, outbox=self.outbox, node_id=self.nodes.node_id_for(obj))
 
     @commands.command(name='connect', aliases=['join'])
     async def connect_command(self, ctx, *, channel: t.Optional[discord.VoiceChannel]):
         player = self.get_player(ctx)
         channel = await player.connect(ctx, channel)
-        await ctx.send(f'Conectado ao canal {channel.name}.')
+        self.outbox.tell(ctx, f'Conectado ao canal {channel.name}.', priority=Priority.INFO, key='connect')
 
     @connect_command.error
     async def connect_command_error(self, ctx, exc):
         if isinstance(exc, AlreadyConnectedToChannel):
-            await ctx.send('Já tá conectado num canal de voz.')
+            self.outbox.tell(ctx, 'Já tá conectado num canal de voz.')
         elif isinstance(exc, NoVoiceChannel):
-            await ctx.send('Nenhum canal de voz foi especificado')
+            self.outbox.tell(ctx, 'Nenhum canal de voz foi especificado')
 
     @commands.command(name='disconnect', aliases=['leave'])
     async def disconnect_command(self, ctx):
         player = self.get_player(ctx)
         await player.teardown()
-        await ctx.send('Desconectando...')
+        self.outbox.tell(ctx, 'Desconectando...', priority=Priority.INFO, key='connect')
 
     @commands.command(name='play', aliases=['p'])
     async def play_command(self, ctx, *, query: t.Optional[str]):
@@ -345,26 +1548,34 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
         if not player.is_connected:
             await player.connect(ctx)
 
-        if query is None:
+        queries = await self.read_queries(ctx, query)
+
+        if not queries:
             if player.queue.is_empty:
                 raise QueueIsEmpty
 
             await player.set_pause(False)
-            await ctx.send('Tocando...')
+            await player.announce(ctx, 'Tocando...')
 
-        else:
-            query = query.strip('<>')
-            if not re.match(URL_REGEX, query):
-                query = f'ytsearch:{query}'
+        elif len(queries) == 1:
+            await player.add_tracks(ctx, await self.find_tracks(queries[0]))
 
-            await player.add_tracks(ctx, await self.wavelink.get_tracks(query))
+        else:
+            ignored = max(len(queries) - BATCH_MAX_QUERIES, 0)
+            queries = queries[:BATCH_MAX_QUERIES]
+            results = await asyncio.gather(*(self.resolve_batch_query(player, q) for q in queries))
+            await player.add_batch(ctx, queries, results, ignored)
 
     @play_command.error
     async def play_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Nenhuma música pra tocar por enquanto')
+            self.outbox.tell(ctx, 'Nenhuma música pra tocar por enquanto')
         elif isinstance(exc, NoVoiceChannel):
-            await ctx.send('Nenhum canal foi especificado.')
+            self.outbox.tell(ctx, 'Nenhum canal foi especificado.')
+        elif isinstance(exc, TrackLookupTimeout):
+            self.outbox.tell(ctx, 'A busca demorou demais, tente novamente.')
+        elif isinstance(exc, NoTracksFound):
+            self.outbox.tell(ctx, 'Nenhuma música encontrada.')
 
     @commands.command(name='pause')
     async def pause_command(self, ctx):
@@ -374,36 +1585,35 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
             raise PlayerIsAlreadyPaused
 
         await player.set_pause(True)
-        await ctx.send('Player pausado')
+        await player.announce(ctx, 'Player pausado')
 
     @pause_command.error
     async def pause_command_error(self, ctx, exc):
         if isinstance(exc, PlayerIsAlreadyPaused):
-            await ctx.send('O player já está pausado.')
+            self.outbox.tell(ctx, 'O player já está pausado.')
 
     @commands.command(name='stop', aliases=['s'])
     async def stop_command(self, ctx):
         player = self.get_player(ctx)
-        player.queue.empty()
-        await player.stop()
-        await ctx.send('Player parado.')
+        await player.mailbox.post(player.halt)
+        await player.announce(ctx, 'Player parado.')
 
     @commands.command(name='next', aliases=['skip', 'n'])
     async def next_command(self, ctx):
         player = self.get_player(ctx)
 
-        if not player.queue.upcoming:
+        if not player.queue.upcoming and not (player.autoplay and player.candidates):
             raise NoMoreTracks
 
-        await player.stop()
-        await ctx.send('Tocando próxima faixa da fila.')
+        await player.mailbox.post(player.skip, 1)
+        await player.announce(ctx, 'Tocando próxima faixa da fila.')
 
     @next_command.error
     async def next_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Impossível de executar, já que a fila não está vazia.')
+            self.outbox.tell(ctx, 'Impossível de executar, já que a fila não está vazia.')
         elif isinstance(exc, NoMoreTracks):
-            await ctx.send('Não existem mais faixas na fila.')
+            self.outbox.tell(ctx, 'Não existem mais faixas na fila.')
 
     @commands.command(name='previous', aliases=['prev'])
     async def previous_command(self, ctx):
@@ -412,27 +1622,26 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
         if not player.queue.history:
             raise NoPreviousTracks
 
-        player.queue.position -= 2
-        await player.stop()
-        await ctx.send('Tocando faixa anterior da fila.')
+        await player.mailbox.post(player.skip, -1)
+        await player.announce(ctx, 'Tocando faixa anterior da fila.')
 
     @previous_command.error
     async def previous_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Erro ao executar, já que a fila não está vazia')
+            self.outbox.tell(ctx, 'Erro ao executar, já que a fila não está vazia')
         elif isinstance(exc, NoPreviousTracks):
-            await ctx.send('Não existem faixas anteriores nessa fila.')
+            self.outbox.tell(ctx, 'Não existem faixas anteriores nessa fila.')
 
     @commands.command(name='shuffle', aliases=['sf', 'embaralha'])
     async def shuffle_command(self, ctx):
         player = self.get_player(ctx)
         player.queue.shuffle()
-        await ctx.send('Fila embaralhada.')
+        self.outbox.tell(ctx, 'Fila embaralhada.', priority=Priority.INFO, key='shuffle')
 
     @shuffle_command.error
     async def shuffle_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Impossível embaralhar a fila, já que está vazia.')
+            self.outbox.tell(ctx, 'Impossível embaralhar a fila, já que está vazia.')
 
     @commands.command(name='repeat', aliases=['repete'])
     async def repeat_command(self, ctx, mode: str):
@@ -441,42 +1650,72 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
 
         player = self.get_player(ctx)
         player.queue.set_repeat_mode(mode)
-        await ctx.send(f'O modo de repetição foi mudado para {mode}.')
+        self.outbox.tell(ctx, f'O modo de repetição foi mudado para {mode}.', priority=Priority.INFO, key='repeat')
+
+    @commands.command(name='autoplay', aliases=['ap'])
+    async def autoplay_command(self, ctx):
+        player = self.get_player(ctx)
+        player.set_autoplay(not player.autoplay)
+
+        if player.autoplay:
+            self.schedule_refill(player)
+            self.outbox.tell(
+                ctx, 'Autoplay ativado: quando a fila acabar, continuo tocando músicas parecidas.',
+                priority=Priority.INFO, key='autoplay')
+        else:
+            self.outbox.tell(ctx, 'Autoplay desativado.', priority=Priority.INFO, key='autoplay')
 
     @commands.command(name='queue', aliases=['q'])
-    async def queue_command(self, ctx, show: t.Optional[int] = 10):
+    async def queue_command(self, ctx, page: t.Optional[int] = 1):
         player = self.get_player(ctx)
 
         if player.queue.is_empty:
             raise QueueIsEmpty
 
-        embed = discord.Embed(
-            title='Queue',
-            description=f'Mostrando próximas {show} faixas',
-            colour=ctx.author.colour,
-            timestamp=dt.datetime.utcnow()
-        )
-        embed.set_author(name='Resultados')
-        embed.set_footer(
-            text=f'Solicitado por {ctx.author.display_name}', icon_url=ctx.author.avatar_url)
-        embed.add_field(
-            name='Tocando atualmente',
-            value=getattr(player.queue.current_track, 'title',
-                          'Nenhuma faixa tocando atualmente.'),
-            inline=False
-        )
-        if upcoming := player.queue.upcoming:
-            embed.add_field(
-                name='Em seguida',
-                value='\n'.join(t.title for t in upcoming[:show]),
-                inline=False
+        page = min(max(page, 1), player.queue.pages) - 1
+        msg = await self.outbox.send(
+            ctx, embed=queue_embed(ctx.author, player.queue, player.queue_page(page)), priority=Priority.INTERACTIVE)
+
+        if msg is not None and player.queue.pages > 1:
+            task = self.bot.loop.create_task(self.browse_queue(ctx, player, msg, page))
+            self._browsers.add(task)
+            task.add_done_callback(self._browsers.discard)
+
+    async def browse_queue(self, ctx, player, msg, page):
+        def _check(r, u):
+            return (
+                r.emoji in PAGE_BUTTONS
+                and u == ctx.author
+                and r.message.id == msg.id
             )
-        await ctx.send(embed=embed)
+
+        for emoji in PAGE_BUTTONS:
+            self.outbox.react(msg, emoji)
+
+        while True:
+            try:
+                reaction, user = await self.bot.wait_for('reaction_add', timeout=QUEUE_BROWSE_TIMEOUT, check=_check)
+            except asyncio.TimeoutError:
+                try:
+                    await msg.clear_reactions()
+                except discord.HTTPException:
+                    pass
+                return
+
+            pages = player.queue.pages
+            if (new := min(max(PAGE_BUTTONS[reaction.emoji](page, pages), 0), pages - 1)) != page:
+                page = new
+                await msg.edit(embed=queue_embed(ctx.author, player.queue, player.queue_page(page)))
+
+            try:
+                await msg.remove_reaction(reaction.emoji, user)
+            except discord.HTTPException:
+                pass
 
     @queue_command.error
     async def queue_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('A fila está vazia')
+            self.outbox.tell(ctx, 'A fila está vazia')
 
     # Requests -----------------------------------------------------------------
 
@@ -490,45 +1729,45 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
         if volume > 150:
             raise VolumeTooHigh
 
-        await player.set_volume(volume)
-        await ctx.send(f'Volume ajustado para {volume:,}%')
+        player.filters.update(volume=volume)
+        self.outbox.tell(ctx, f'Volume ajustado para {volume:,}%', priority=Priority.INFO, key='volume')
 
     @volume_group.error
     async def volume_group_error(self, ctx, exc):
         if isinstance(exc, VolumeTooLow):
-            await ctx.send('O volume precisa ser 0% ou maior')
+            self.outbox.tell(ctx, 'O volume precisa ser 0% ou maior')
         elif isinstance(exc, VolumeTooHigh):
-            await ctx.send('O volume precisa ser 150% ou menor')
+            self.outbox.tell(ctx, 'O volume precisa ser 150% ou menor')
 
     @volume_group.command(name='up')
     async def volume_up_command(self, ctx):
         player = self.get_player(ctx)
 
-        if player.volume == 150:
+        if (volume := player.target_volume) == 150:
             raise MaxVolume
 
-        await player.set_volume(value := min(player.volume + 10, 150))
-        await ctx.send(f'Volume ajustado para {value:,}%')
+        player.filters.update(volume=(value := min(volume + 10, 150)))
+        self.outbox.tell(ctx, f'Volume ajustado para {value:,}%', priority=Priority.INFO, key='volume')
 
     @volume_up_command.error
     async def volume_up_command_error(self, ctx, exc):
         if isinstance(exc, MaxVolume):
-            await ctx.send('O Player já está no volume máximo.')
+            self.outbox.tell(ctx, 'O Player já está no volume máximo.')
 
     @volume_group.command(name='down')
     async def volume_down_command(self, ctx):
         player = self.get_player(ctx)
 
-        if player.volume == 0:
+        if (volume := player.target_volume) == 0:
             raise MinVolume
 
-        await player.set_volume(value := max(0, player.volume - 10))
-        await ctx.send(f'Volume alterado para {value:,}%')
+        player.filters.update(volume=(value := max(0, volume - 10)))
+        self.outbox.tell(ctx, f'Volume alterado para {value:,}%', priority=Priority.INFO, key='volume')
 
     @volume_down_command.error
     async def volume_down_command_error(self, ctx, exc):
         if isinstance(exc, MinVolume):
-            await ctx.send('O Player já está no menor volume possível')
+            self.outbox.tell(ctx, 'O Player já está no menor volume possível')
 
     @commands.command(name='lyrics', aliases=['letras', 'l'])
     async def lyrics_command(self, ctx, name: t.Optional[str]):
@@ -536,45 +1775,41 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
         name = name or player.queue.current_track.title
 
         async with ctx.typing():
-            async with aiohttp.request('GET', LYRICS_URL + name, headers={}) as r:
-                if not 200 <= r.status <= 299:
-                    raise NoLyricsFound
+            if (data := await self.get_lyrics(name)) is None:
+                raise NoLyricsFound
 
-                data = await r.json()
+            if len(data['lyrics']) > 2000:
+                return self.outbox.tell(ctx, f'<{data["links"]["genius"]}>')
 
-                if len(data['lyrics']) > 2000:
-                    return await ctx.send(f'<{data["links"]["genius"]}>')
-
-                embed = discord.Embed(
-                    title=data['title'],
-                    description=data['lyrics'],
-                    colour=ctx.author.colour,
-                    timestamp=dt.datetime.utcnow(),
-                )
-                embed.set_thumbnail(url=data['thumbnail']['genius'])
-                embed.set_author(name=data['author'])
-                await ctx.send(embed=embed)
+            embed = discord.Embed(
+                title=data['title'],
+                description=data['lyrics'],
+                colour=ctx.author.colour,
+                timestamp=dt.datetime.utcnow(),
+            )
+            embed.set_thumbnail(url=data['thumbnail']['genius'])
+            embed.set_author(name=data['author'])
+            self.outbox.tell(ctx, embed=embed)
 
     @lyrics_command.error
     async def lyrics_command_error(self, ctx, exc):
         if isinstance(exc, NoLyricsFound):
-            await ctx.send('Nenhuma letra pôde ser encontrada.')
+            self.outbox.tell(ctx, 'Nenhuma letra pôde ser encontrada.')
 
     @commands.command(name='eq', aliases=['equalizer'])
     async def eq_command(self, ctx, preset: str):
         player = self.get_player(ctx)
 
-        eq = getattr(wavelink.eqs.Equalizer, preset, None)
-        if not eq:
+        if (eq := EQ_PRESETS.get(preset)) is None:
             raise InvalidEQPreset
 
-        await player.set_eq(eq())
-        await ctx.send(f'Equalizador ajustado para {preset}.')
+        player.filters.update(equalizer=eq)
+        self.outbox.tell(ctx, f'Equalizador ajustado para {preset}.', priority=Priority.INFO, key='eq')
 
     @eq_command.error
     async def eq_command_error(self, ctx, exc):
         if isinstance(exc, InvalidEQPreset):
-            await ctx.send('O preset do equalizador deve ser "flat", "boost", "metal", ou "piano".')
+            self.outbox.tell(ctx, 'O preset do equalizador deve ser "flat", "boost", "metal", ou "piano".')
 
     @commands.command(name='adveq', aliases=['aeq'])
     async def adveq_command(self, ctx, band: int, gain: float):
@@ -590,21 +1825,20 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
             raise EQGainOutOfBounds
 
         player.eq_levels[band - 1] = gain / 10
-        eq = wavelink.eqs.Equalizer(
-            levels=[(i, gain) for i, gain in enumerate(player.eq_levels)])
-        await player.set_eq(eq)
-        await ctx.send('Equalizador ajustado')
+        player.filters.update(equalizer=custom_equalizer(player.eq_levels))
+        self.outbox.tell(ctx, 'Equalizador ajustado', priority=Priority.INFO, key='eq')
 
     @adveq_command.error
     async def adveq_command_error(self, ctx, exc):
         if isinstance(exc, NonExistentEQBand):
-            await ctx.send(
+            self.outbox.tell(
+                ctx,
                 'Esse é um equalizador de 15 bandas - o número deve ser '
                 'entre 1 e 15, ou uma das frequências a seguir: '
                 + ', '.join(str(b) for b in HZ_BANDS)
             )
         elif isinstance(exc, EQGainOutOfBounds):
-            await ctx.send('O ganho do EQ deve ser entre 10 dB e -10 dB.')
+            self.outbox.tell(ctx, 'O ganho do EQ deve ser entre 10 dB e -10 dB.')
 
     @commands.command(name='playing', aliases=['np', 'now-playing'])
     async def playing_command(self, ctx):
@@ -613,33 +1847,12 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
         if not player.is_playing:
             raise PlayerIsAlreadyPaused
 
-        embed = discord.Embed(
-            title='Now playing',
-            colour=ctx.author.colour,
-            timestamp=dt.datetime.utcnow(),
-        )
-        embed.set_author(name='Info. do Playback')
-        embed.set_footer(
-            text=f'Solicitado por {ctx.author.display_name}', icon_url=ctx.author.avatar_url)
-        embed.add_field(name='Título da Faixa',
-                        value=player.queue.current_track.title, inline=False)
-        embed.add_field(
-            name='Artista', value=player.queue.current_track.author, inline=False)
-
-        position = divmod(player.position, 60000)
-        length = divmod(player.queue.current_track.length, 60000)
-        embed.add_field(
-            name='Duração',
-            value=f'{int(position[0])}:{round(position[1]/1000):02}/{int(length[0])}:{round(length[1]/1000):02}',
-            inline=False
-        )
-
-        await ctx.send(embed=embed)
+        await player.panel.show(ctx)
 
     @playing_command.error
     async def playing_command_error(self, ctx, exc):
         if isinstance(exc, PlayerIsAlreadyPaused):
-            await ctx.send('Não existem faixas para serem tocadas no momento.')
+            self.outbox.tell(ctx, 'Não existem faixas para serem tocadas no momento.')
 
     @commands.command(name='skipto', aliases=['playindex', 'pularpara'])
     async def skipto_command(self, ctx, index: int):
@@ -651,16 +1864,15 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
         if not 0 <= index <= player.queue.length:
             raise NoMoreTracks
 
-        player.queue.position = index - 2
-        await player.stop()
-        await ctx.send(f'Tocando faixa da posição {index}.')
+        await player.mailbox.post(player.skip, 0, index - 1)
+        await player.announce(ctx, f'Tocando faixa da posição {index}.')
 
     @skipto_command.error
     async def skipto_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Não existem faixas na fila.')
+            self.outbox.tell(ctx, 'Não existem faixas na fila.')
         elif isinstance(exc, NoMoreTracks):
-            await ctx.send('O índice inserido está fora do limite da fila.')
+            self.outbox.tell(ctx, 'O índice inserido está fora do limite da fila.')
 
     @commands.command(name='forward', aliases=['fw'])
     async def forward_command(self, ctx, index: int):
@@ -669,16 +1881,15 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
             raise QueueIsEmpty
         if not 0 <= index <= player.queue.length:
             raise NoMoreTracks
-        player.queue.position += index - 1
-        await player.stop()
-        await ctx.send(f'Tocando faixa da posição {player.queue.position + 2}.')
+        await player.mailbox.post(player.skip, index)
+        await player.announce(ctx, f'Tocando faixa da posição {player.queue.position + 1}.')
 
     @forward_command.error
     async def forward_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Não existem faixas na fila.')
+            self.outbox.tell(ctx, 'Não existem faixas na fila.')
         elif isinstance(exc, NoMoreTracks):
-            await ctx.send('O valor inserido ultrapassa o limite da fila.')
+            self.outbox.tell(ctx, 'O valor inserido ultrapassa o limite da fila.')
 
     @commands.command(name='back', aliases=['bc'])
     async def back_command(self, ctx, index: int):
@@ -687,16 +1898,15 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
             raise QueueIsEmpty
         if not 0 <= index <= player.queue.length:
             raise NoMoreTracks
-        player.queue.position -= index + 1
-        await player.stop()
-        await ctx.send(f'Tocando faixa da posição {player.queue.position + 2}.')
+        await player.mailbox.post(player.skip, -index)
+        await player.announce(ctx, f'Tocando faixa da posição {player.queue.position + 1}.')
 
     @back_command.error
     async def back_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Não existem faixas na fila.')
+            self.outbox.tell(ctx, 'Não existem faixas na fila.')
         elif isinstance(exc, NoMoreTracks):
-            await ctx.send('O valor inserido ultrapassa o limite da fila.')
+            self.outbox.tell(ctx, 'O valor inserido ultrapassa o limite da fila.')
 
     @commands.command(name='restart', aliases=['rs'])
     async def restart_command(self, ctx):
@@ -706,12 +1916,12 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
             raise QueueIsEmpty
 
         await player.seek(0)
-        await ctx.send('Faixa reiniciada')
+        await player.announce(ctx, 'Faixa reiniciada')
 
     @restart_command.error
     async def restart_command_error(self, ctx, exc):
         if isinstance(exc, QueueIsEmpty):
-            await ctx.send('Não existem faixas na fila.')
+            self.outbox.tell(ctx, 'Não existem faixas na fila.')
 
     @commands.command(name='seek', aliases=['buscar'])
     async def seek_command(self, ctx, position: str):
@@ -729,7 +1939,7 @@ class Musiking(commands.Cog, wavelink.WavelinkMixin):
             secs = int(match.group(1))
 
         await player.seek(secs * 1000)
-        await ctx.send('Buscado.')
+        await player.announce(ctx, f'Buscado para {format_duration(secs * 1000)}.')
 
 
 def setup(bot):
@@ -0,0 +1,17 @@
+from .cache import TrackCache, TTLCache, normalize_query
+from .singleflight import SingleFlight
+from .nodes import NodePool, load_nodes
+from .tracks import CompactTrack, TrackDecodeError, decode_track
+from .state import StateStore, shuffle_tail
+from .stats import RollingStats
+from .metrics import MetricsServer, Registry, watch_loop_lag
+from .filters import FilterState
+from .occupancy import VoiceOccupancy
+from .mailbox import Mailbox
+from .history import SpillList
+from .prefix import PrefixSums
+from .autoplay import RequestBudget, TransitionIndex
+from .search import SearchIndex
+from .sources import Query, classify
+from .panel import LivePanel
+from .outbox import Outbox, Priority
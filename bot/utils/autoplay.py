@@ -0,0 +1,68 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+
+class TransitionIndex:
+    def __init__(self, path=None, ttl=90 * 24 * 60 * 60):
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(path or ':memory:', isolation_level=None, timeout=5.0)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS tracks (uri TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS transitions '
+            '(guild INTEGER, prev TEXT, next TEXT, plays INTEGER NOT NULL, last REAL NOT NULL, '
+            'PRIMARY KEY (guild, prev, next))')
+        self._db.execute('DELETE FROM transitions WHERE last <= ?', (time.time() - ttl,))
+        self._db.execute('DELETE FROM tracks WHERE uri NOT IN (SELECT next FROM transitions)')
+        self.recorded = 0
+
+    def record(self, guild_id, prev, track):
+        # Tracks are stored as CompactTrack rows, so whatever comes out of
+        # the index plays without another lookup.
+        self._db.execute(
+            'INSERT OR REPLACE INTO tracks VALUES (?, ?)',
+            (track.uri, json.dumps(track.dump(), separators=(',', ':'))))
+        self._db.execute(
+            'INSERT INTO transitions VALUES (?, ?, ?, 1, ?) '
+            'ON CONFLICT (guild, prev, next) DO UPDATE SET plays = plays + 1, last = excluded.last',
+            (guild_id, prev.uri, track.uri, time.time()))
+        self.recorded += 1
+
+    def successors(self, guild_id, prev, limit=10):
+        rows = self._db.execute(
+            'SELECT t.data FROM transitions x JOIN tracks t ON t.uri = x.next '
+            'WHERE x.guild = ? AND x.prev = ? ORDER BY x.plays DESC, x.last DESC LIMIT ?',
+            (guild_id, prev.uri, limit))
+        return [json.loads(data) for data, in rows]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class RequestBudget:
+    # A token bucket per key: `rate` requests a second, bursts up to `burst`.
+    def __init__(self, rate=1.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self.denied = 0
+
+    def take(self, key):
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.denied += 1
+            return False
+
+        self._buckets[key] = (tokens - 1, now)
+        return True
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import wavelink
+
+SEARCH_PREFIXES = ('ytsearch', 'ytmsearch', 'scsearch')
+
+
+def normalize_query(query):
+    query = ' '.join(query.split())
+    prefix, sep, rest = query.partition(':')
+
+    # Only searches are case-insensitive, URLs carry case-sensitive ids.
+    if sep and prefix.lower() in SEARCH_PREFIXES:
+        return f'{prefix.lower()}:{rest.strip().casefold()}'
+
+    return query
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value, expires = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expires <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class TrackCache:
+    def __init__(self, maxsize=4096, ttl=6 * 60 * 60, path=None):
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize, ttl)
+        self._db = None
+        self._worker = None
+        self.disk_hits = 0
+
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            # The store is only touched from its own thread after this.
+            self._worker = ThreadPoolExecutor(1, thread_name_prefix='musiking-track-cache')
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS tracks '
+                '(query TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+            self._db.execute('DELETE FROM tracks WHERE expires <= ?', (time.time(),))
+
+    async def get(self, query):
+        key = normalize_query(query)
+
+        if (data := self._memory.get(key)) is None and self._db is not None:
+            if (row := await asyncio.get_event_loop().run_in_executor(self._worker, self._read, key)) is not None:
+                data, remaining = row
+                self._memory.set(key, data, ttl=remaining)
+                self.disk_hits += 1
+
+        if data is not None:
+            return self._load(data)
+
+    def _read(self, key):
+        row = self._db.execute('SELECT data, expires FROM tracks WHERE query = ?', (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        if (remaining := row[1] - time.time()) <= 0:
+            self._db.execute('DELETE FROM tracks WHERE query = ?', (key,))
+            return None
+
+        return json.loads(row[0]), remaining
+
+    def put(self, query, tracks):
+        if not tracks:
+            return
+
+        key = normalize_query(query)
+        data = self._dump(tracks)
+        self._memory.set(key, data)
+
+        if self._db is not None:
+            self._worker.submit(self._write, key, data, time.time() + self.ttl).add_done_callback(self._report)
+
+    def _write(self, key, data, expires):
+        self._db.execute(
+            'INSERT OR REPLACE INTO tracks VALUES (?, ?, ?)', (key, json.dumps(data, separators=(',', ':')), expires))
+
+    @staticmethod
+    def _report(fut):
+        if (exc := fut.exception()) is not None:
+            print(f' Could not store tracks: {exc!r}')
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.shutdown()
+            self._worker = None
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def stats(self):
+        stats = self._memory.stats
+        stats['hits'] += self.disk_hits
+        stats['misses'] -= self.disk_hits
+        stats['disk_hits'] = self.disk_hits
+        return stats
+
+    @staticmethod
+    def _dump(tracks):
+        if isinstance(tracks, wavelink.TrackPlaylist):
+            return tracks.data
+
+        return {
+            'playlistInfo': {},
+            'tracks': [{'track': t.id, 'info': t.info} for t in tracks],
+        }
+
+    @staticmethod
+    def _load(data):
+        if data['playlistInfo']:
+            return wavelink.TrackPlaylist(data=data)
+
+        return [wavelink.Track(id_=t['track'], info=t['info']) for t in data['tracks']]
@@ -0,0 +1,42 @@
+import asyncio
+
+
+class FilterState:
+    def __init__(self, apply, delay=0.3):
+        self.apply = apply
+        self.delay = delay
+        self.pending = {}
+        self.requested = 0
+        self.flushed = 0
+        self._task = None
+
+    def get(self, key, default=None):
+        return self.pending.get(key, default)
+
+    def update(self, **changes):
+        self.pending.update(changes)
+        self.requested += 1
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        # Changes made while a flush is being sent are picked up by the
+        # next round instead of starting another task.
+        while self.pending:
+            await asyncio.sleep(self.delay)
+            await self.flush()
+
+    async def flush(self):
+        pending, self.pending = self.pending, {}
+
+        if pending:
+            self.flushed += 1
+            await self.apply(**pending)
+
+    def cancel(self):
+        self.pending.clear()
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
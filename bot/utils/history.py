@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from array import array
+from collections.abc import Sequence
+
+READ_BLOCK = 64
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sizeof(item):
+    # Slotted records like CompactTrack, counting the strings they hold.
+    return sys.getsizeof(item) + sum(sys.getsizeof(getattr(item, s, None)) for s in getattr(item, '__slots__', ()))
+
+
+class SpillList(Sequence):
+    def __init__(self, path=None, load=None, dump=None):
+        self.path = path
+        self.load = load
+        self.dump = dump
+        self.items = []
+        # Everything before `offset` lives on disk, one JSON row per line;
+        # `_lines` holds where each of those rows starts.
+        self.offset = 0
+        self._lines = array('Q')
+        self._size = 0
+        self._block = (None, ())
+
+    def __len__(self):
+        return self.offset + len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if (window := range(len(self))[index]).step == 1:
+                return list(self.iterate(window.start, window.stop))
+            return [self[i] for i in window]
+
+        if index < 0:
+            index += len(self)
+
+        if index >= self.offset:
+            return self.items[index - self.offset]
+
+        if index < 0:
+            raise IndexError('list index out of range')
+
+        # Walking back through history or replaying it on repeat reads
+        # neighbouring rows, so they are read a block at a time.
+        if (block := index // READ_BLOCK) != self._block[0]:
+            start = block * READ_BLOCK
+            self._block = (block, list(self._read(start, min(start + READ_BLOCK, self.offset))))
+
+        return self._block[1][index % READ_BLOCK]
+
+    def __setitem__(self, index, value):
+        self.items[self._resident(index)] = value
+
+    def __delitem__(self, index):
+        del self.items[self._resident(index)]
+
+    def __iter__(self):
+        return self.iterate(0, len(self))
+
+    def _resident(self, index):
+        if (index := range(len(self))[index]) < self.offset:
+            raise IndexError('spilled items are read-only')
+
+        return index - self.offset
+
+    def _read(self, start, stop):
+        with open(self.path, 'rb') as f:
+            f.seek(self._lines[start])
+
+            for _ in range(start, stop):
+                yield self.load(json.loads(f.readline()))
+
+    def iterate(self, start, stop):
+        if start < self.offset:
+            yield from self._read(start, min(stop, self.offset))
+
+        yield from self.items[max(start - self.offset, 0):max(stop - self.offset, 0)]
+
+    def index(self, value, start=0):
+        # Only resident items can be found; spilled ones are copies.
+        return self.items.index(value, max(start - self.offset, 0)) + self.offset
+
+    def extend(self, values):
+        self.items.extend(values)
+
+    def spill(self, count):
+        if self.path is None:
+            fd, self.path = tempfile.mkstemp(prefix='musiking-history-', suffix='.jsonl')
+            os.close(fd)
+            # Nobody else knows about this file, so it goes with the list.
+            weakref.finalize(self, _remove, self.path)
+
+        # The first spill starts the file over, dropping whatever an earlier
+        # player for the same guild left behind.
+        written = self.items[:count]
+
+        with open(self.path, 'ab' if self.offset else 'wb') as f:
+            for item in written:
+                self._lines.append(self._size)
+                self._size += f.write(json.dumps(self.dump(item), separators=(',', ':')).encode() + b'\n')
+
+        del self.items[:count]
+        self.offset += len(written)
+        self._block = (None, ())
+        return len(written)
+
+    def drop(self, count):
+        # Forgets the oldest `count` spilled rows. The file is copied without
+        # them, so this is only worth doing in large batches.
+        if (count := min(count, self.offset)) <= 0:
+            return 0
+
+        cut = self._lines[count] if count < self.offset else self._size
+        tmp = f'{self.path}.tmp'
+
+        with open(self.path, 'rb') as src, open(tmp, 'wb') as dst:
+            src.seek(cut)
+            shutil.copyfileobj(src, dst)
+
+        os.replace(tmp, self.path)
+        self._lines = array('Q', (line - cut for line in self._lines[count:]))
+        self._size -= cut
+        self.offset -= count
+        self._block = (None, ())
+        return count
+
+    def reopen(self, count):
+        # Picks up `count` rows spilled by an earlier run. Rows written after
+        # the last journaled spill are cut off.
+        lines, size = array('Q'), 0
+
+        if count and self.path is not None:
+            try:
+                with open(self.path, 'r+b') as f:
+                    while len(lines) < count and (line := f.readline()).endswith(b'\n'):
+                        lines.append(size)
+                        size += len(line)
+
+                    f.truncate(size)
+            except OSError:
+                pass
+
+        if len(lines) < count:
+            return False
+
+        self.offset, self._lines, self._size = count, lines, size
+        self._block = (None, ())
+        return True
+
+    def clear(self):
+        self.items.clear()
+        self.offset, self._lines, self._size = 0, array('Q'), 0
+        self._block = (None, ())
+
+        if self.path is not None:
+            _remove(self.path)
+
+    def footprint(self):
+        return {
+            'resident': len(self.items),
+            'spilled': self.offset,
+            'memory_bytes': (sys.getsizeof(self.items) + sys.getsizeof(self._lines)
+                             + sum(sizeof(item) for item in self.items)),
+            'disk_bytes': self._size,
+        }
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+from .stats import RollingStats
+
+
+class Mailbox:
+    def __init__(self, name=None):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.latency = RollingStats(256)
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._running = None
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def post(self, func, *args):
+        fut = asyncio.get_event_loop().create_future()
+        self._queue.put_nowait((func, args, fut, time.perf_counter()))
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+        return fut
+
+    def tell(self, func, *args):
+        # Fire and forget, for events nobody is waiting on.
+        self.post(func, *args).add_done_callback(self._report)
+
+    def _report(self, fut):
+        if not fut.cancelled() and (exc := fut.exception()) is not None:
+            print(f' Mailbox {self.name} failed: {exc!r}')
+
+    async def _run(self):
+        while True:
+            func, args, fut, posted = await self._queue.get()
+
+            if fut.cancelled():
+                continue
+
+            self._running = fut
+
+            try:
+                result = await func(*args)
+            except Exception as exc:
+                if not fut.done():
+                    fut.set_exception(exc)
+            else:
+                if not fut.done():
+                    fut.set_result(result)
+            finally:
+                self._running = None
+
+            self.processed += 1
+            self.latency.add((time.perf_counter() - posted) * 1000)
+
+    def close(self):
+        # Whoever awaits the action cut short, or one never started, would
+        # otherwise wait forever. An action closing its own mailbox finishes.
+        if self._task is not None and self._task is not asyncio.current_task():
+            if self._running is not None:
+                self._running.cancel()
+
+            self._task.cancel()
+
+        self._task = None
+
+        while not self._queue.empty():
+            self._queue.get_nowait()[2].cancel()
+
+    @property
+    def stats(self):
+        return {
+            'depth': len(self),
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'latency_ms': self.latency.summary,
+        }
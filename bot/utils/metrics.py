@@ -0,0 +1,171 @@
+import asyncio
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+
+    if not pairs:
+        return ''
+
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in pairs) + '}'
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def clear(self):
+        self._values.clear()
+
+    def samples(self):
+        for values, value in self._values.items():
+            yield self.name, values, (), value
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type}'
+
+        for name, values, extra, value in self.samples():
+            yield f'{name}{_format_labels(self.labels, values, extra)} {value:g}'
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value, labels=()):
+        # For totals that are already counted elsewhere, copied in on scrape.
+        self._values[labels] = value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, labels=()):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        if (entry := self._values.get(labels)) is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def time(self, labels=()):
+        return _Timer(self, labels)
+
+    def samples(self):
+        for values, (counts, total) in self._values.items():
+            cumulative = 0
+
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f'{bound:g}'
+                yield f'{self.name}_bucket', values, (('le', le),), cumulative
+
+            yield f'{self.name}_sum', values, (), total
+            yield f'{self.name}_count', values, (), cumulative
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, func):
+        # Collectors run on scrape only, so values that are expensive to
+        # gather cost nothing while nobody is looking.
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        for collect in self._collectors:
+            collect()
+
+        return '\n'.join(line for m in self._metrics for line in m.render()) + '\n'
+
+
+class MetricsServer:
+    def __init__(self, registry, host='127.0.0.1', port=9808):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        # aiohttp.web is only needed once the endpoint is up, keep it off
+        # the import path.
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        return web.Response(body=self.registry.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def watch_loop_lag(histogram, interval=0.5):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        histogram.observe(max(0., time.perf_counter() - started - interval))
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+
+DEFAULT_NODES = {
+    'MAIN': {
+        'host': '127.0.0.1',
+        'port': 2333,
+        'rest_uri': 'http://127.0.0.1:2333',
+        'password': 'youshallnotpass',
+        'identifier': 'MAIN',
+        'region': 'brazil',
+    }
+}
+
+
+def load_nodes(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            nodes = json.load(f)
+    except FileNotFoundError:
+        return DEFAULT_NODES
+
+    for identifier, node in nodes.items():
+        node.setdefault('identifier', identifier)
+
+    return nodes
+
+
+class _LoggedInBot:
+    # wavelink waits for the whole gateway to be ready before opening a node
+    # connection, though all it needs is the user id known after login.
+    def __init__(self, bot, logged_in):
+        self._bot = bot
+        self._logged_in = logged_in
+
+    def __getattr__(self, name):
+        return getattr(self._bot, name)
+
+    async def wait_until_ready(self):
+        await self._logged_in.wait()
+
+
+class NodePool:
+    def __init__(self, client, nodes, check_interval=5.0, region_penalty=100.0):
+        self.client = client
+        self.nodes = nodes
+        self.check_interval = check_interval
+        self.region_penalty = region_penalty
+        self.failovers = 0
+        self._monitor = None
+
+    async def connect(self, logged_in=None):
+        bot = self.client.bot
+
+        if logged_in is not None:
+            self.client.bot = _LoggedInBot(bot, logged_in)
+
+        try:
+            results = await asyncio.gather(
+                *(self.client.initiate_node(**node) for node in self.nodes.values()),
+                return_exceptions=True)
+        finally:
+            self.client.bot = bot
+
+        for identifier, result in zip(self.nodes, results):
+            if isinstance(result, Exception):
+                print(f' Failed to connect to node `{identifier}`: {result!r}')
+
+        if self._monitor is None:
+            self._monitor = asyncio.ensure_future(self._watch())
+
+    def close(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    @staticmethod
+    def load(node):
+        if (stats := node.stats) is None:
+            return float(len(node.players))
+
+        # Stats only arrive once a minute, so count players placed since then.
+        return stats.penalty.total + max(0, len(node.players) - stats.players)
+
+    def score(self, node, region=None):
+        score = self.load(node)
+
+        if region is not None and (node.region or '').lower() != region.lower():
+            score += self.region_penalty
+
+        return score
+
+    def best_node(self, region=None, exclude=None):
+        nodes = [n for n in self.client.nodes.values() if n.is_available and n is not exclude]
+        return min(nodes, key=lambda n: self.score(n, region), default=None)
+
+    def node_id_for(self, guild):
+        if (node := self.best_node(str(guild.region))) is not None:
+            return node.identifier
+
+    async def evacuate(self, node):
+        for player in list(node.players.values()):
+            guild = player.bot.get_guild(player.guild_id)
+            region = str(guild.region) if guild is not None else node.region
+
+            if (target := self.best_node(region, exclude=node)) is None:
+                return
+
+            # Resume from the last offset the dead node reported instead of
+            # extrapolating past audio that was never sent.
+            player.last_update = time.time() * 1000
+
+            try:
+                await player.change_node(target.identifier)
+                await player.set_eq(player.equalizer)
+            except Exception as exc:
+                print(f' Failed to move player {player.guild_id} off `{node.identifier}`: {exc}')
+            else:
+                self.failovers += 1
+                print(f' Moved player {player.guild_id} from `{node.identifier}` to `{target.identifier}`.')
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+
+            for node in list(self.client.nodes.values()):
+                if node.players and not node.is_available:
+                    await self.evacuate(node)
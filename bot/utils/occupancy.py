@@ -0,0 +1,29 @@
+class VoiceOccupancy:
+    def __init__(self):
+        self._channels = {}
+        self._listeners = {}
+
+    def __len__(self):
+        return len(self._channels)
+
+    def watch(self, guild_id, channel_id, members):
+        # Counting members only happens when the bot itself joins or moves;
+        # from then on the count follows voice events.
+        self.unwatch(guild_id)
+        self._channels[guild_id] = channel_id
+        self._listeners[channel_id] = sum(not m.bot for m in members)
+
+    def unwatch(self, guild_id):
+        if (channel_id := self._channels.pop(guild_id, None)) is not None:
+            self._listeners.pop(channel_id, None)
+
+    def move(self, before_id, after_id):
+        if before_id in self._listeners:
+            self._listeners[before_id] = max(0, self._listeners[before_id] - 1)
+
+        if after_id in self._listeners:
+            self._listeners[after_id] += 1
+
+    def listeners(self, guild_id):
+        if (channel_id := self._channels.get(guild_id)) is not None:
+            return self._listeners[channel_id]
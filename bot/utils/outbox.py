@@ -0,0 +1,250 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+import discord
+
+from .stats import RollingStats
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    REPLY = 1
+    INFO = 2
+
+
+class _Bucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _fill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        self._fill()
+        return max((1 - self.tokens) / self.rate, 0)
+
+    def take(self):
+        self._fill()
+        self.tokens -= 1
+
+    def refill_time(self):
+        self._fill()
+        return (self.burst - self.tokens) / self.rate
+
+
+class _Entry:
+    __slots__ = ('priority', 'seq', 'created', 'kind', 'key', 'func', 'args', 'kwargs', 'future')
+
+    def __init__(self, priority, seq, kind, key, func, args, kwargs):
+        self.priority = priority
+        self.seq = seq
+        self.created = time.monotonic()
+        self.kind = kind
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = asyncio.get_event_loop().create_future()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Channel:
+    def __init__(self, buckets):
+        self.heap = []
+        self.keys = {}
+        self.buckets = buckets
+        self.wake = asyncio.Event()
+        self.task = None
+
+    @property
+    def depth(self):
+        # Dropped and cancelled entries stay in the heap until they reach
+        # the top.
+        return sum(not e.future.done() for e in self.heap)
+
+
+class Outbox:
+    # Everything the bot sends goes through a queue per channel, paced to
+    # Discord's per-channel buckets so the library never has to sit out a
+    # 429. Lower priorities go first; informational messages with the same
+    # key collapse into the latest one, and are the first thrown away once
+    # a channel falls behind.
+    def __init__(self, rate=1.0, burst=5, reaction_rate=4.0, global_rate=50.0, max_depth=10, stale_after=15.0):
+        self.rate = rate
+        self.burst = burst
+        self.reaction_rate = reaction_rate
+        self.max_depth = max_depth
+        self.stale_after = stale_after
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.latency = {p: RollingStats(256) for p in Priority}
+        self._global = _Bucket(global_rate, global_rate)
+        self._channels = {}
+        self._seq = itertools.count()
+
+    def send(self, destination, content=None, *, embed=None, priority=Priority.REPLY, key=None):
+        # `destination` is a context or channel, as with `ctx.send`. Resolves
+        # to the message, or to None if it was dropped or Discord refused it.
+        channel_id = getattr(destination, 'channel', destination).id
+        return self._put(channel_id, priority, 'message', key, destination.send, (content,), {'embed': embed})
+
+    def tell(self, destination, content=None, *, embed=None, priority=Priority.REPLY, key=None):
+        self.send(destination, content, embed=embed, priority=priority, key=key).add_done_callback(self._report)
+
+    def react(self, message, emoji, priority=Priority.INTERACTIVE):
+        fut = self._put(message.channel.id, priority, 'reaction', None, message.add_reaction, (emoji,), {})
+        fut.add_done_callback(self._report)
+        return fut
+
+    def _report(self, fut):
+        if not fut.cancelled() and (exc := fut.exception()) is not None:
+            print(f' Outbox send failed: {exc!r}')
+
+    def _put(self, channel_id, priority, kind, key, func, args, kwargs):
+        if (channel := self._channels.get(channel_id)) is None:
+            channel = self._channels[channel_id] = _Channel({
+                'message': _Bucket(self.rate, self.burst),
+                'reaction': _Bucket(self.reaction_rate, 1),
+            })
+
+        if key is not None and (entry := channel.keys.get(key)) is not None:
+            # Only the latest "volume is now N" matters.
+            entry.args, entry.kwargs = args, kwargs
+            self.coalesced += 1
+            return entry.future
+
+        entry = _Entry(priority, next(self._seq), kind, key, func, args, kwargs)
+
+        if channel.depth >= self.max_depth:
+            stale = [e for e in channel.heap if e.priority == Priority.INFO and not e.future.done()]
+
+            if stale:
+                self._drop(channel, min(stale, key=lambda e: e.seq))
+            elif priority == Priority.INFO:
+                self.dropped += 1
+                entry.future.set_result(None)
+                return entry.future
+
+        heapq.heappush(channel.heap, entry)
+
+        if key is not None:
+            channel.keys[key] = entry
+
+        channel.wake.set()
+
+        if channel.task is None:
+            channel.task = asyncio.ensure_future(self._drain(channel_id, channel))
+
+        return entry.future
+
+    def _drop(self, channel, entry):
+        self.dropped += 1
+
+        if channel.keys.get(entry.key) is entry:
+            del channel.keys[entry.key]
+
+        entry.future.set_result(None)
+
+    def _head(self, channel):
+        while channel.heap:
+            entry = channel.heap[0]
+
+            if entry.future.done():
+                heapq.heappop(channel.heap)
+            elif entry.priority == Priority.INFO and time.monotonic() - entry.created > self.stale_after:
+                heapq.heappop(channel.heap)
+                self._drop(channel, entry)
+            else:
+                return entry
+
+    async def _drain(self, channel_id, channel):
+        try:
+            while True:
+                if (entry := self._head(channel)) is None:
+                    # A channel that just went quiet is kept until its
+                    # buckets refill, so it cannot come back with a fresh
+                    # burst.
+                    channel.wake.clear()
+                    idle = max(b.refill_time() for b in channel.buckets.values())
+
+                    try:
+                        await asyncio.wait_for(channel.wake.wait(), idle)
+                    except asyncio.TimeoutError:
+                        return
+
+                    continue
+
+                # Something more urgent may show up while this waits, so
+                # the head is looked at again after every sleep.
+                if (wait := max(channel.buckets[entry.kind].delay(), self._global.delay())) > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                heapq.heappop(channel.heap)
+                channel.buckets[entry.kind].take()
+                self._global.take()
+
+                if channel.keys.get(entry.key) is entry:
+                    del channel.keys[entry.key]
+
+                await self._deliver(entry)
+        finally:
+            if self._channels.get(channel_id) is channel:
+                del self._channels[channel_id]
+
+    async def _deliver(self, entry):
+        try:
+            result = await entry.func(*entry.args, **entry.kwargs)
+        except discord.HTTPException as exc:
+            print(f' Could not send to Discord: {exc!r}')
+            self.failed += 1
+            result = None
+        except Exception as exc:
+            self.failed += 1
+            if not entry.future.done():
+                entry.future.set_exception(exc)
+            return
+        else:
+            self.sent += 1
+            self.latency[entry.priority].add((time.monotonic() - entry.created) * 1000)
+
+        if not entry.future.done():
+            entry.future.set_result(result)
+
+    def close(self):
+        for channel in self._channels.values():
+            channel.task.cancel()
+
+            for entry in channel.heap:
+                entry.future.cancel()
+
+        self._channels.clear()
+
+    def depth(self, priority=None):
+        return sum(
+            not e.future.done() and (priority is None or e.priority == priority)
+            for channel in self._channels.values() for e in channel.heap)
+
+    @property
+    def stats(self):
+        return {
+            'channels': len(self._channels),
+            'depth': self.depth(),
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'latency_ms': {p.name.lower(): self.latency[p].summary for p in Priority},
+        }
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import discord
+
+
+class LivePanel:
+    # One message kept up to date by editing it. `state` returns a hashable
+    # snapshot and `render` turns one into an embed; refreshes coalesce into
+    # at most one edit per `interval`, and a state equal to the one on
+    # screen sends nothing.
+    def __init__(self, state, render, interval=3.0, send=None):
+        self.state = state
+        self.render = render
+        self.interval = interval
+        self.send = send or self._send
+        self.message = None
+        self.requested = 0
+        self.posted = 0
+        self.edits = 0
+        self.skipped = 0
+        self._shown = None
+        self._edited = 0.0
+        self._dirty = False
+        self._task = None
+
+    @property
+    def channel_id(self):
+        return self.message.channel.id if self.message is not None else None
+
+    async def show(self, destination):
+        # Posts the panel at the bottom of `destination`, replacing the old one.
+        old, self.message = self.message, None
+        self._dirty = False
+        self._shown = self.state()
+
+        if (message := await self.send(destination, self.render(self._shown))) is None:
+            self.message = old
+            return
+
+        self.message = message
+        self._edited = time.monotonic()
+        self.posted += 1
+        self._schedule()
+
+        if old is not None:
+            await self._delete(old)
+
+    def refresh(self):
+        self.requested += 1
+        self._dirty = True
+        self._schedule()
+
+    def _schedule(self):
+        if self._dirty and self.message is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        # Refreshes that land while this waits, or while an edit is being
+        # sent, ride along with the next edit instead of adding their own.
+        while self._dirty and self.message is not None:
+            await asyncio.sleep(max(self._edited + self.interval - time.monotonic(), 0))
+            await self.flush()
+
+    async def flush(self):
+        self._dirty = False
+
+        if self.message is None:
+            return
+
+        if (state := self.state()) == self._shown:
+            self.skipped += 1
+            return
+
+        self._shown = state
+        self._edited = time.monotonic()
+
+        try:
+            await self.message.edit(embed=self.render(state))
+        except discord.NotFound:
+            self.message = None
+        except discord.HTTPException as exc:
+            print(f' Could not update panel: {exc!r}')
+            self._shown = None
+        else:
+            self.edits += 1
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if self.message is not None:
+            await self._delete(self.message)
+            self.message = None
+
+    @staticmethod
+    async def _send(destination, embed):
+        return await destination.send(embed=embed)
+
+    @staticmethod
+    async def _delete(message):
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+    @property
+    def stats(self):
+        return {'requested': self.requested, 'posted': self.posted, 'edits': self.edits, 'skipped': self.skipped}
@@ -0,0 +1,108 @@
+from array import array
+from itertools import accumulate
+from operator import sub
+
+
+class PrefixSums:
+    # A Fenwick tree: prefix sums and single updates in O(log n).
+    def __init__(self, values=()):
+        self.values = array('q', values)
+        self.total = sum(self.values)
+        self._build()
+
+    def __len__(self):
+        return len(self.values)
+
+    def _build(self):
+        self._tree = array('q')
+        self._grow(0)
+
+    def _grow(self, n):
+        # Adds the nodes for values[n:]. Node i sums values[i & (i + 1):i + 1],
+        # a difference of two running totals, and nodes of one size sit at a
+        # fixed stride, so each size is a single slice assignment.
+        if (stop := len(self.values)) <= n:
+            return
+
+        running = list(accumulate(self.values[n:], initial=self._prefix(n)))
+        tree = self._tree
+        tree.frombytes(bytes(tree.itemsize * (stop - n)))
+        size = 1
+
+        while size <= stop:
+            step = size * 2
+            first = n + (size - 1 - n) % step
+
+            # At most one node of each size also covers old values.
+            if first < stop and first + 1 - size < n:
+                tree[first] = running[first + 1 - n] - self._prefix(first + 1 - size)
+                first += step
+
+            if first < stop:
+                ends = running[first + 1 - n:stop + 1 - n:step]
+                starts = running[first + 1 - size - n:stop + 1 - size - n:step]
+                tree[first:stop:step] = array('q', list(map(sub, ends, starts)))
+
+            size = step
+
+    def _prefix(self, stop):
+        total, i = 0, min(stop, len(self.values)) - 1
+
+        while i >= 0:
+            total += self._tree[i]
+            i = (i & (i + 1)) - 1
+
+        return total
+
+    def sum(self, start=0, stop=None):
+        start = max(start, 0)
+        stop = len(self.values) if stop is None else stop
+
+        if stop <= start:
+            return 0
+
+        return self._prefix(stop) - self._prefix(start)
+
+    def append(self, value):
+        i = len(self.values)
+        self.values.append(value)
+        self._tree.append(value + self._prefix(i) - self._prefix(i & (i + 1)))
+        self.total += value
+
+    def extend(self, values):
+        n = len(self.values)
+        self.values.extend(values)
+        self._grow(n)
+        self.total = self._prefix(len(self.values))
+
+    def set(self, index, value):
+        delta = value - self.values[index]
+        self.values[index] = value
+        self.total += delta
+
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index |= index + 1
+
+    def delete(self, index):
+        self.total -= self.values.pop(index)
+        self._build()
+
+    def drop(self, count):
+        # Forgets the first `count` values, shifting the rest down.
+        del self.values[:count]
+        self.total = sum(self.values)
+        self._build()
+
+    def rewrite(self, start, values):
+        # For reorders that touch the whole tail anyway, like a shuffle.
+        # Nodes before `start` only cover values before it, so they stay.
+        self.values[start:] = array('q', values)
+        del self._tree[start:]
+        self._grow(start)
+        self.total = self._prefix(len(self.values))
+
+    def clear(self):
+        self.values = array('q')
+        self._tree = array('q')
+        self.total = 0
@@ -0,0 +1,131 @@
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+
+from .tracks import CompactTrack
+
+# Words that decorate titles without telling songs apart.
+NOISE_WORDS = frozenset((
+    'official', 'oficial', 'video', 'audio', 'lyric', 'lyrics', 'letra', 'clipe', 'music', 'musica',
+    'hd', 'hq', '4k', 'ft', 'feat', 'remastered', 'visualizer',
+))
+
+
+def tokens(text):
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return re.findall(r'\w+', ''.join(c for c in text if not unicodedata.combining(c)))
+
+
+class SearchIndex:
+    def __init__(self, path=None, maxsize=200_000, min_coverage=0.6):
+        self.min_coverage = min_coverage
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Opened here, but used from whichever single thread the owner picks.
+        db = sqlite3.connect(path or ':memory:', isolation_level=None, timeout=5.0, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+
+        try:
+            db.executescript('''
+                CREATE TABLE IF NOT EXISTS tracks (
+                    id INTEGER PRIMARY KEY, uri TEXT UNIQUE NOT NULL, title TEXT NOT NULL,
+                    author TEXT NOT NULL, data TEXT NOT NULL, plays INTEGER NOT NULL DEFAULT 0,
+                    seen REAL NOT NULL);
+                CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+                    title, author, content='tracks', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2');
+                CREATE TRIGGER IF NOT EXISTS tracks_ai AFTER INSERT ON tracks BEGIN
+                    INSERT INTO search (rowid, title, author) VALUES (new.id, new.title, new.author);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tracks_ad AFTER DELETE ON tracks BEGIN
+                    INSERT INTO search (search, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tracks_au AFTER UPDATE OF title, author ON tracks BEGIN
+                    INSERT INTO search (search, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+                    INSERT INTO search (rowid, title, author) VALUES (new.id, new.title, new.author);
+                END;
+            ''')
+        except sqlite3.OperationalError as exc:
+            # SQLite builds without FTS5 just go without the index.
+            print(f' Local search index disabled: {exc}')
+            db.close()
+            return
+
+        db.execute(
+            'DELETE FROM tracks WHERE id IN '
+            '(SELECT id FROM tracks ORDER BY plays DESC, seen DESC LIMIT -1 OFFSET ?)', (maxsize,))
+        self._db = db
+
+    def add(self, tracks):
+        if self._db is None:
+            return
+
+        now = time.time()
+        rows = [
+            (t.uri, t.title, t.author, json.dumps(CompactTrack.from_track(t).dump(), separators=(',', ':')), now)
+            for t in tracks if t.uri and t.title
+        ]
+
+        self._db.execute('BEGIN')
+        self._db.executemany(
+            'INSERT INTO tracks (uri, title, author, data, seen) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (uri) DO UPDATE SET title = excluded.title, author = excluded.author, '
+            'data = excluded.data, seen = excluded.seen', rows)
+        self._db.execute('COMMIT')
+
+    def played(self, track):
+        if self._db is not None and track.uri:
+            self._db.execute('UPDATE tracks SET plays = plays + 1, seen = ? WHERE uri = ?', (time.time(), track.uri))
+
+    def discard(self, uri):
+        if self._db is not None:
+            self._db.execute('DELETE FROM tracks WHERE uri = ?', (uri,))
+
+    def search(self, query, limit=20):
+        if self._db is None or not (words := tokens(query)):
+            return []
+
+        rows = self._db.execute(
+            'SELECT t.title, t.data, t.plays FROM search JOIN tracks t ON t.id = search.rowid '
+            'WHERE search MATCH ? ORDER BY rank LIMIT ?',
+            (' '.join(f'"{w}"' for w in words), limit))
+        return [(title, json.loads(data), plays) for title, data, plays in rows]
+
+    def best(self, query):
+        # Every word of the query is in the title or author, and the title
+        # is mostly made of the query: "numb" finds "Numb" but not
+        # "Numb (Live at Download)".
+        words = set(tokens(query))
+        best, best_key = None, None
+
+        for rank, (title, data, plays) in enumerate(self.search(query)):
+            title_words = set(tokens(title)) - NOISE_WORDS
+            coverage = len(words & title_words) / len(title_words) if title_words else 0
+
+            if coverage >= self.min_coverage and (key := (coverage, plays, -rank)) > (best_key or ()):
+                best, best_key = data, key
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return CompactTrack.load(best)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
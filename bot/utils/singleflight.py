@@ -0,0 +1,36 @@
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, factory, timeout=None):
+        if (fut := self._calls.get(key)) is None:
+            fut = asyncio.ensure_future(factory())
+            self._calls[key] = fut
+            fut.add_done_callback(lambda f: self._finish(key, f))
+            self.started += 1
+        else:
+            self.shared += 1
+
+        # The shield keeps one caller's timeout or cancellation from
+        # cancelling the lookup every other caller is waiting on.
+        return await asyncio.wait_for(asyncio.shield(fut), timeout)
+
+    def _finish(self, key, fut):
+        if self._calls.get(key) is fut:
+            del self._calls[key]
+
+        if not fut.cancelled():
+            # Mark the exception as retrieved even if every waiter timed out.
+            fut.exception()
+
+    @property
+    def stats(self):
+        return {'in_flight': len(self._calls), 'started': self.started, 'shared': self.shared}
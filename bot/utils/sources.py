@@ -0,0 +1,110 @@
+import string
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+SEARCH_PREFIXES = ('ytsearch:', 'ytmsearch:', 'scsearch:')
+YOUTUBE_HOSTS = frozenset(('youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtube-nocookie.com'))
+YOUTUBE_ID_CHARS = frozenset(string.ascii_letters + string.digits + '-_')
+DOMAIN_CHARS = frozenset(string.ascii_lowercase + string.digits + '.-')
+
+
+class Query(NamedTuple):
+    source: str
+    kind: str
+    identifier: str
+    id: Optional[str] = None
+
+
+def _is_youtube_id(value, length=None):
+    return bool(value) and (length is None or len(value) == length) and set(value) <= YOUTUBE_ID_CHARS
+
+
+def _as_url(token):
+    # Only str methods here: each check is one pass over the token, so
+    # nothing a user types can make it backtrack.
+    lowered = token.lower()
+
+    if lowered.startswith(('http://', 'https://')):
+        return token
+
+    if lowered.startswith('www.'):
+        return 'https://' + token
+
+    host, slash, _ = lowered.partition('/')
+    name, dot, tld = host.rpartition('.')
+
+    if slash and dot and name and set(host) <= DOMAIN_CHARS and len(tld) >= 2 and tld.isalpha():
+        return 'https://' + token
+
+
+def _param(query, name):
+    for pair in query.split('&'):
+        key, _, value = pair.partition('=')
+        if key == name:
+            return value
+
+
+def _youtube(host, parts):
+    path = parts.path.strip('/').split('/')
+    video = playlist = None
+
+    if host == 'youtu.be':
+        video = path[0]
+    elif path[0] == 'watch':
+        video = _param(parts.query, 'v')
+    elif path[0] in ('shorts', 'live', 'embed') and len(path) > 1:
+        video = path[1]
+
+    if path[0] in ('watch', 'playlist'):
+        playlist = _param(parts.query, 'list')
+
+    # A video opened from inside a playlist or mix plays just the video.
+    if _is_youtube_id(video, 11):
+        return Query('youtube', 'track', f'https://www.youtube.com/watch?v={video}', video)
+
+    if _is_youtube_id(playlist):
+        return Query('youtube', 'playlist', f'https://www.youtube.com/playlist?list={playlist}', playlist)
+
+
+def _route(url):
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return Query('http', 'track', url)
+
+    host = (parts.hostname or '').lower()
+    host = host[4:] if host.startswith('www.') else host
+    path = parts.path.rstrip('/')
+    # Tracking parameters only split the cache, the path is the resource.
+    bare = f'https://{host}{path}'
+
+    if host in YOUTUBE_HOSTS or host == 'youtu.be':
+        if (query := _youtube(host, parts)) is not None:
+            return query
+    elif host in ('soundcloud.com', 'm.soundcloud.com', 'on.soundcloud.com'):
+        return Query('soundcloud', 'playlist' if '/sets/' in path else 'track', bare)
+    elif host.endswith('.bandcamp.com'):
+        return Query('bandcamp', 'playlist' if path.startswith('/album/') else 'track', bare)
+    elif host in ('twitch.tv', 'm.twitch.tv'):
+        if path.startswith('/videos/'):
+            return Query('twitch', 'track', bare, path.rpartition('/')[2])
+        return Query('twitch', 'stream', bare, path.strip('/') or None)
+    elif host in ('vimeo.com', 'player.vimeo.com'):
+        video = path.rpartition('/')[2]
+        if video.isdigit():
+            return Query('vimeo', 'track', f'https://vimeo.com/{video}', video)
+
+    return Query('http', 'track', url)
+
+
+def classify(text):
+    text = text.strip().strip('<>')
+    token = text.split(None, 1)[0] if text else ''
+
+    if text.lower().startswith(SEARCH_PREFIXES):
+        return Query('search', 'search', text)
+
+    if (url := _as_url(token)) is not None:
+        return _route(url)
+
+    return Query('search', 'search', f'ytsearch:{text}')
@@ -0,0 +1,169 @@
+import json
+import os
+import random
+from pathlib import Path
+
+
+def shuffle_tail(items, start, seed=None):
+    rand = random.Random(seed).random
+    start = max(start, 0)
+
+    for i in range(len(items) - 1, start, -1):
+        j = start + int(rand() * (i - start + 1))
+        items[i], items[j] = items[j], items[i]
+
+
+def new_record():
+    return {
+        'channel_id': None,
+        'tracks': [],
+        'spilled': 0,
+        'position': 0,
+        'repeat_mode': 0,
+        'volume': 100,
+        'equalizer': None,
+        'eq_levels': [0.] * 15,
+        'offset': 0,
+        'paused': False,
+        'autoplay': False,
+    }
+
+
+def apply_entry(records, entry):
+    guild_id = entry['g']
+
+    if (op := entry['op']) == 'remove':
+        records.pop(guild_id, None)
+        return
+
+    record = records.setdefault(guild_id, new_record())
+    # Journaled indexes count spilled tracks, `tracks` starts after them.
+    base = record.setdefault('spilled', 0)
+
+    if op == 'add':
+        record['tracks'].extend(entry['tracks'])
+    elif op == 'empty':
+        record['tracks'].clear()
+        record['position'] = 0
+        record['spilled'] = 0
+        record['offset'] = 0
+    elif op == 'set_track':
+        record['tracks'][entry['index'] - base] = entry['track']
+        # The snapshot's offset belongs to the track it replaced.
+        if entry['index'] == record['position']:
+            record['offset'] = 0
+    elif op == 'del_track':
+        del record['tracks'][entry['index'] - base]
+    elif op == 'shuffle':
+        shuffle_tail(record['tracks'], entry['start'] - base, entry['seed'])
+    elif op == 'spill':
+        del record['tracks'][:entry['n']]
+        record['spilled'] += entry['n']
+    elif op == 'drop':
+        record['spilled'] -= entry['n']
+        record['position'] -= entry['n']
+    elif op == 'position':
+        record['position'] = entry['v']
+        record['offset'] = 0
+    elif op == 'eq':
+        record['equalizer'] = entry['equalizer']
+        record['eq_levels'] = entry['eq_levels']
+    else:
+        record[op] = entry['v']
+
+
+class StateStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.path / 'snapshot.json'
+        self.journal_path = self.path / 'journal.jsonl'
+        self.seq = 0
+        self._journal = None
+        self.paused = False
+
+    def history_path(self, guild_id):
+        path = self.path / 'history'
+        path.mkdir(exist_ok=True)
+        return path / f'{guild_id}.jsonl'
+
+    def load(self):
+        records = {}
+
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            pass
+        else:
+            self.seq = snapshot['seq']
+            records = {int(g): r for g, r in snapshot['guilds'].items()}
+
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write.
+                        break
+
+                    if entry['seq'] > self.seq:
+                        apply_entry(records, entry)
+                        self.seq = entry['seq']
+        except FileNotFoundError:
+            pass
+
+        return records
+
+    def log(self, guild_id, op, **data):
+        if self.paused:
+            return
+
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+        self.seq += 1
+        entry = {'seq': self.seq, 'g': guild_id, 'op': op, **data}
+        self._journal.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._journal.flush()
+
+    def write_snapshot(self, records, seq):
+        tmp = self.snapshot_path.with_suffix('.tmp')
+
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'seq': seq, 'guilds': records}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.snapshot_path)
+
+    def compact(self, seq):
+        # Entries up to `seq` are covered by the snapshot; anything logged
+        # while it was being written is kept.
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+        kept = []
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        if json.loads(line)['seq'] > seq:
+                            kept.append(line)
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            pass
+
+        tmp = self.journal_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+
+        os.replace(tmp, self.journal_path)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,33 @@
+from collections import deque
+
+
+class RollingStats:
+    def __init__(self, maxlen=1024):
+        self._values = deque(maxlen=maxlen)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self._values.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if not self._values:
+            return 0.0
+
+        values = sorted(self._values)
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+    @property
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
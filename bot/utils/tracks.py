@@ -0,0 +1,127 @@
+import base64
+import struct
+
+TRACK_INFO_VERSIONED = 1
+
+
+class TrackDecodeError(ValueError):
+    pass
+
+
+class _Reader:
+    __slots__ = ('data', 'offset')
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def read(self, fmt):
+        try:
+            value, = struct.unpack_from(fmt, self.data, self.offset)
+        except struct.error as exc:
+            raise TrackDecodeError(str(exc)) from None
+
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def read_utf(self):
+        size = self.read('>H')
+        raw = self.data[self.offset:self.offset + size]
+
+        if len(raw) != size:
+            raise TrackDecodeError('truncated string')
+
+        self.offset += size
+        # Java's modified UTF-8: encoded NULs and CESU-8 surrogate pairs.
+        text = raw.replace(b'\xc0\x80', b'\x00').decode('utf-8', 'surrogatepass')
+        return text.encode('utf-16', 'surrogatepass').decode('utf-16')
+
+    def read_nullable_utf(self):
+        return self.read_utf() if self.read('>?') else None
+
+
+def decode_track(blob):
+    try:
+        data = base64.b64decode(blob, validate=True)
+    except ValueError as exc:
+        raise TrackDecodeError(str(exc)) from None
+
+    reader = _Reader(data)
+    header = reader.read('>i')
+    version = reader.read('>B') if (header >> 30) & TRACK_INFO_VERSIONED else 1
+
+    info = {
+        'title': reader.read_utf(),
+        'author': reader.read_utf(),
+        'length': reader.read('>q'),
+        'identifier': reader.read_utf(),
+        'isStream': reader.read('>?'),
+        'uri': reader.read_nullable_utf() if version >= 2 else None,
+    }
+
+    if version >= 3:
+        info['artworkUrl'] = reader.read_nullable_utf()
+        info['isrc'] = reader.read_nullable_utf()
+
+    info['sourceName'] = reader.read_utf()
+    return info
+
+
+class CompactTrack:
+    __slots__ = ('id', 'title', 'author', 'length', 'uri', '_info')
+
+    def __init__(self, id_, title, author, length, uri):
+        self.id = id_
+        self.title = title
+        self.author = author
+        self.length = length
+        self.uri = uri
+        self._info = None
+
+    @classmethod
+    def from_track(cls, track):
+        if isinstance(track, cls):
+            return track
+
+        return cls(track.id, track.title, track.author, track.length, track.uri)
+
+    @classmethod
+    def load(cls, row):
+        return cls(*row)
+
+    def dump(self):
+        return [self.id, self.title, self.author, self.length, self.uri]
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f'<CompactTrack title={self.title!r} author={self.author!r}>'
+
+    @property
+    def info(self):
+        if self._info is None:
+            self._info = decode_track(self.id)
+
+        return self._info
+
+    @property
+    def duration(self):
+        return self.length
+
+    @property
+    def identifier(self):
+        return self.info['identifier']
+
+    @property
+    def is_stream(self):
+        return self.info['isStream']
+
+    @property
+    def source(self):
+        return self.info['sourceName']
+
+    @property
+    def thumb(self):
+        if self.source == 'youtube':
+            return f'https://img.youtube.com/vi/{self.identifier}/hqdefault.jpg'
@@ -1,9 +1,23 @@
+import argparse
+
 from bot import Musiking
 
 
 def main():
-    bot = Musiking()
-    bot.run()
+    parser = argparse.ArgumentParser(description="MusiKing")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="processes to split the shards across (1 runs everything here)")
+    parser.add_argument("-s", "--shards", type=int,
+                        help="total shard count (defaults to Discord's recommendation)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        from bot.cluster import Cluster
+
+        Cluster(args.workers, args.shards).run()
+    else:
+        bot = Musiking(shard_count=args.shards)
+        bot.run()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,31 @@
+import asyncio
+from collections import deque
+
+from bot.cogs.music import Player, Queue
+from bot.utils import CompactTrack
+
+
+def track(i):
+    return CompactTrack(f'id{i}', f'track {i}', 'author', 1000, None)
+
+
+def test_candidate_plays_after_forwarding_past_the_end():
+    player = Player.__new__(Player)
+    player.queue = Queue()
+    player.queue.add(*map(track, range(5)))
+    player.queue.skip_to(3)
+    player.queue.get_next_track()
+    player.candidates = deque([track(5)])
+    played = []
+
+    async def play(t):
+        played.append(t)
+
+    player.play = play
+    player.queue.skip_to(player.queue.position + 5)
+    assert player.queue.get_next_track() is None
+
+    asyncio.run(player._play_candidate())
+    assert [t.title for t in played] == ['track 5']
+    assert player.queue.position == 5
+    assert player.queue.current_track is played[0]
@@ -0,0 +1,86 @@
+import pytest
+
+from bot.utils.history import READ_BLOCK, SpillList
+
+
+def spill_list(path, values=(), spilled=0):
+    items = SpillList(str(path), list, list)
+    items.extend([i, f'row {i}'] for i in values)
+    items.spill(spilled)
+    return items
+
+
+def rows(values):
+    return [[i, f'row {i}'] for i in values]
+
+
+def test_reads_across_block_boundaries(tmp_path):
+    items = spill_list(tmp_path / 'h.jsonl', range(3 * READ_BLOCK), 2 * READ_BLOCK + 5)
+    expected = rows(range(3 * READ_BLOCK))
+
+    assert len(items) == len(expected)
+    assert list(items) == expected
+    assert [items[i] for i in range(len(items))] == expected
+    assert items[-1] == expected[-1]
+    assert items[READ_BLOCK - 2:READ_BLOCK + 2] == expected[READ_BLOCK - 2:READ_BLOCK + 2]
+    assert items[2 * READ_BLOCK:2 * READ_BLOCK + 10] == expected[2 * READ_BLOCK:2 * READ_BLOCK + 10]
+    assert items[::7] == expected[::7]
+    assert list(items.iterate(READ_BLOCK - 1, 2 * READ_BLOCK + 7)) == expected[READ_BLOCK - 1:2 * READ_BLOCK + 7]
+
+
+def test_spilled_rows_are_read_only(tmp_path):
+    items = spill_list(tmp_path / 'h.jsonl', range(10), 5)
+
+    with pytest.raises(IndexError):
+        items[2] = [0, 'x']
+
+    items[7] = [0, 'x']
+    assert items[7] == [0, 'x']
+
+
+def test_spill_counts_only_resident_rows(tmp_path):
+    items = spill_list(tmp_path / 'h.jsonl', range(10))
+
+    assert items.spill(25) == 10
+    assert items.offset == len(items) == 10
+    assert list(items) == rows(range(10))
+
+
+def test_reopen(tmp_path):
+    path = tmp_path / 'h.jsonl'
+    spill_list(path, range(2 * READ_BLOCK), READ_BLOCK + 3)
+
+    items = SpillList(str(path), list, list)
+    assert items.reopen(READ_BLOCK + 3)
+    items.extend(rows(range(READ_BLOCK + 3, 2 * READ_BLOCK)))
+    assert list(items) == rows(range(2 * READ_BLOCK))
+
+    # More rows than the file holds: the history is gone.
+    assert not SpillList(str(path), list, list).reopen(5 * READ_BLOCK)
+
+
+def test_reopen_cuts_rows_past_the_journaled_count(tmp_path):
+    path = tmp_path / 'h.jsonl'
+    spill_list(path, range(20), 20)
+
+    items = SpillList(str(path), list, list)
+    assert items.reopen(12)
+    items.extend(rows(range(12, 15)))
+    items.spill(3)
+    assert list(items) == rows(range(15))
+
+
+def test_drop(tmp_path):
+    path = tmp_path / 'h.jsonl'
+    items = spill_list(path, range(3 * READ_BLOCK), 2 * READ_BLOCK)
+    # A block read before the drop must not be served after it.
+    assert items[READ_BLOCK] == rows([READ_BLOCK])[0]
+
+    assert items.drop(READ_BLOCK + 1) == READ_BLOCK + 1
+    assert list(items) == rows(range(READ_BLOCK + 1, 3 * READ_BLOCK))
+    assert items[0] == rows([READ_BLOCK + 1])[0]
+    assert items.footprint()['disk_bytes'] == path.stat().st_size
+
+    reopened = SpillList(str(path), list, list)
+    assert reopened.reopen(items.offset)
+    assert list(reopened) == rows(range(READ_BLOCK + 1, 2 * READ_BLOCK))
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bot.cogs import music
+from bot.utils import SingleFlight, TTLCache
+
+
+class StubLyrics:
+    def __init__(self, songs, delay=0.0):
+        self.songs = songs
+        self.delay = delay
+        self.hits = []
+        self.peers = set()
+
+    async def handle(self, request):
+        title = request.query['title']
+        self.hits.append(title)
+        self.peers.add(request.transport.get_extra_info('peername'))
+        await asyncio.sleep(self.delay)
+
+        if title == 'broken':
+            return web.Response(status=500)
+
+        if (lyrics := self.songs.get(title)) is None:
+            return web.json_response({'error': 'not found'}, status=404)
+
+        return web.json_response({'title': title, 'author': 'stub', 'lyrics': lyrics})
+
+
+def run(monkeypatch, stub, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_get('/lyrics', stub.handle)
+
+        async with TestServer(app) as server:
+            monkeypatch.setattr(music, 'LYRICS_URL', str(server.make_url('/lyrics?title=')))
+            cog = music.Musiking.__new__(music.Musiking)
+            cog.lyrics_cache = TTLCache(music.LYRICS_CACHE_SIZE, music.LYRICS_CACHE_TTL)
+            cog.lookups = SingleFlight()
+            cog._session = None
+
+            try:
+                return await scenario(cog)
+            finally:
+                await cog.session.close()
+
+    return asyncio.run(main())
+
+
+def test_hits_are_cached(monkeypatch):
+    stub = StubLyrics({'song': 'la la la'})
+
+    async def scenario(cog):
+        first = await cog.get_lyrics('song')
+        second = await cog.get_lyrics('  SONG ')
+        return first, second
+
+    first, second = run(monkeypatch, stub, scenario)
+    assert first['lyrics'] == 'la la la'
+    assert second == first
+    assert stub.hits == ['song']
+
+
+def test_misses_are_cached(monkeypatch):
+    stub = StubLyrics({})
+
+    async def scenario(cog):
+        return [await cog.get_lyrics('nothing') for _ in range(3)]
+
+    assert run(monkeypatch, stub, scenario) == [None, None, None]
+    assert stub.hits == ['nothing']
+
+
+def test_errors_are_not_cached(monkeypatch):
+    stub = StubLyrics({})
+
+    async def scenario(cog):
+        for _ in range(2):
+            with pytest.raises(music.NoLyricsFound):
+                await cog.get_lyrics('broken')
+
+    run(monkeypatch, stub, scenario)
+    assert stub.hits == ['broken', 'broken']
+
+
+def test_concurrent_lookups_share_one_request(monkeypatch):
+    stub = StubLyrics({'song': 'la la la'}, delay=0.05)
+
+    async def scenario(cog):
+        return await asyncio.gather(*(cog.get_lyrics('song') for _ in range(10)))
+
+    results = run(monkeypatch, stub, scenario)
+    assert all(r['lyrics'] == 'la la la' for r in results)
+    assert stub.hits == ['song']
+
+
+def test_session_reuses_connections(monkeypatch):
+    stub = StubLyrics({f'song {i}': 'la' for i in range(5)})
+
+    async def scenario(cog):
+        for i in range(5):
+            await cog.get_lyrics(f'song {i}')
+
+    run(monkeypatch, stub, scenario)
+    assert len(stub.hits) == 5
+    assert len(stub.peers) == 1
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from bot.utils import PrefixSums
+
+
+def check(sums, values):
+    assert list(sums.values) == values
+    assert len(sums) == len(values)
+    assert sums.total == sum(values)
+
+    for start in range(-1, len(values) + 2):
+        for stop in range(max(start, 0), len(values) + 2):
+            assert sums.sum(start, stop) == sum(values[max(start, 0):stop])
+
+        assert sums.sum(start) == sum(values[max(start, 0):])
+
+
+@pytest.mark.parametrize('size', [0, 1, 2, 7, 8, 9, 33])
+def test_build_and_extend(size):
+    values = list(range(1, size + 1))
+    check(PrefixSums(values), values)
+
+    for split in range(size + 1):
+        sums = PrefixSums(values[:split])
+        sums.extend(values[split:])
+        check(sums, values)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_operations_match_a_list(seed):
+    rng = random.Random(seed)
+    values = [rng.randrange(1000) for _ in range(rng.randrange(40))]
+    sums = PrefixSums(values)
+
+    for _ in range(30):
+        op = rng.choice(('append', 'extend', 'set', 'delete', 'rewrite', 'drop'))
+
+        if op == 'append':
+            values.append(rng.randrange(1000))
+            sums.append(values[-1])
+        elif op == 'extend':
+            more = [rng.randrange(1000) for _ in range(rng.randrange(20))]
+            values.extend(more)
+            sums.extend(more)
+        elif op == 'set' and values:
+            index, value = rng.randrange(len(values)), rng.randrange(1000)
+            values[index] = value
+            sums.set(index, value)
+        elif op == 'delete' and values:
+            index = rng.randrange(len(values))
+            del values[index]
+            sums.delete(index)
+        elif op == 'rewrite':
+            start = rng.randrange(len(values) + 2)
+            tail = values[start:]
+            rng.shuffle(tail)
+            values[start:] = tail
+            sums.rewrite(start, tail)
+        elif op == 'drop':
+            count = rng.randrange(len(values) + 1)
+            del values[:count]
+            sums.drop(count)
+
+        check(sums, values)
+
+
+def test_clear():
+    sums = PrefixSums([1, 2, 3])
+    sums.clear()
+    check(sums, [])
+    sums.extend([4, 5])
+    check(sums, [4, 5])
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from bot.cogs.music import HISTORY_DROP_BATCH, HISTORY_SPILL_BATCH, Queue, QueueView, RepeatMode
+from bot.utils import CompactTrack, SpillList
+
+
+def tracks(n, start=0):
+    return [CompactTrack(f'id{i}', f'track {i}', 'author', 1000 * (i + 1), None) for i in range(start, start + n)]
+
+
+def test_spill_after_forwarding_past_the_end(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    queue = Queue(path, history_size=0)
+    queue.add(*tracks(HISTORY_SPILL_BATCH + 10))
+    queue.skip_to(len(queue) + 100)
+
+    assert queue.get_next_track() is None
+    assert queue.spilled == len(queue) == HISTORY_SPILL_BATCH + 10
+    assert [t.title for t in queue] == [t.title for t in tracks(HISTORY_SPILL_BATCH + 10)]
+
+    reopened = Queue(path)
+    reopened.restore([], queue.position, queue.spilled)
+    assert reopened.spilled == len(reopened) == len(queue)
+    assert [t.title for t in reopened] == [t.title for t in queue]
+
+
+def test_shuffle_a_finished_queue():
+    queue = Queue()
+    queue.add(*tracks(5))
+    queue.skip_to(len(queue))
+    assert queue.get_next_track() is None
+
+    queue.shuffle()
+    assert [t.title for t in queue] == [t.title for t in tracks(5)]
+    assert queue.lengths.total == sum(t.length for t in tracks(5))
+
+
+def test_shuffle_keeps_lengths_in_step(tmp_path):
+    queue = Queue(str(tmp_path / 'history.jsonl'), history_size=0)
+    queue.add(*tracks(HISTORY_SPILL_BATCH + 20))
+    queue.skip_to(HISTORY_SPILL_BATCH + 5)
+    queue.get_next_track()
+
+    queue.shuffle()
+    assert queue.spilled == HISTORY_SPILL_BATCH + 5
+    assert list(queue.lengths.values) == [t.length for t in queue]
+    assert sorted(t.title for t in queue) == sorted(t.title for t in tracks(HISTORY_SPILL_BATCH + 20))
+
+
+def test_oldest_history_is_dropped_past_the_limit(tmp_path):
+    queue = Queue(str(tmp_path / 'history.jsonl'), history_size=0, history_limit=HISTORY_DROP_BATCH)
+    played = tracks(3 * HISTORY_DROP_BATCH)
+    queue.add(played[0])
+
+    for track in played[1:]:
+        queue.add(track)
+        queue.get_next_track()
+
+    assert HISTORY_DROP_BATCH <= queue.spilled < 2 * HISTORY_DROP_BATCH
+    assert queue.current_track is played[-1]
+    assert [t.title for t in queue] == [t.title for t in played[-len(queue):]]
+    assert list(queue.lengths.values) == [t.length for t in queue]
+    assert queue.footprint()['disk_bytes'] == os.path.getsize(tmp_path / 'history.jsonl')
+
+
+def test_repeat_all_keeps_the_whole_history(tmp_path):
+    queue = Queue(str(tmp_path / 'history.jsonl'), history_size=0, history_limit=HISTORY_DROP_BATCH)
+    queue.repeat_mode = RepeatMode.ALL
+
+    for track in tracks(3 * HISTORY_DROP_BATCH):
+        queue.add(track)
+        queue.get_next_track()
+
+    assert len(queue) == 3 * HISTORY_DROP_BATCH
+
+
+@pytest.mark.parametrize('start, stop', [(0, None), (3, None), (5, 15), (12, 40), (25, None), (0, 0), (30, 10)])
+def test_queue_view_matches_list_slicing(tmp_path, start, stop):
+    items = SpillList(str(tmp_path / 'history.jsonl'), list, list)
+    items.extend([i] for i in range(20))
+    items.spill(8)
+    expected = [[i] for i in range(20)][start:stop]
+    view = QueueView(items, start, stop)
+
+    assert len(view) == len(expected)
+    assert bool(view) == bool(expected)
+    assert list(view) == expected
+    assert [view[i] for i in range(len(view))] == expected
+    assert [view[-i] for i in range(1, len(view) + 1)] == expected[::-1]
+
+    for window in (slice(None, 4), slice(-4, None), slice(2, -2), slice(None, None, 3), slice(None, None, -1)):
+        assert view[window] == expected[window]
+
+    with pytest.raises(IndexError):
+        view[len(expected)]
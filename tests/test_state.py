@@ -0,0 +1,48 @@
+from bot.utils.state import StateStore
+
+
+def replay(path, *entries, **snapshot):
+    store = StateStore(path)
+    record = {
+        'channel_id': 1, 'tracks': ['a', 'b', 'c'], 'spilled': 0, 'position': 0, 'repeat_mode': 0,
+        'volume': 100, 'equalizer': None, 'eq_levels': [0.] * 15, 'offset': 170000, 'paused': False,
+        'autoplay': False, **snapshot,
+    }
+    store.write_snapshot({1: record}, 0)
+
+    for op, data in entries:
+        store.log(1, op, **data)
+
+    store.close()
+    return StateStore(path).load()[1]
+
+
+def test_snapshot_offset_survives_unrelated_ops(tmp_path):
+    record = replay(tmp_path, ('volume', {'v': 50}), ('add', {'tracks': ['d']}))
+    assert record['position'] == 0
+    assert record['offset'] == 170000
+
+
+def test_position_change_resets_offset(tmp_path):
+    record = replay(tmp_path, ('position', {'v': 1}))
+    assert record['position'] == 1
+    assert record['offset'] == 0
+
+
+def test_empty_resets_offset(tmp_path):
+    record = replay(tmp_path, ('empty', {}))
+    assert record['tracks'] == []
+    assert record['offset'] == 0
+
+
+def test_replacing_current_track_resets_offset(tmp_path):
+    assert replay(tmp_path / 'current', ('set_track', {'index': 0, 'track': 'x'}))['offset'] == 0
+    assert replay(tmp_path / 'other', ('set_track', {'index': 2, 'track': 'x'}))['offset'] == 170000
+
+
+def test_dropped_history_shifts_position(tmp_path):
+    record = replay(tmp_path, ('spill', {'n': 2}), ('drop', {'n': 2}), position=2, spilled=3, offset=5000)
+    assert record['tracks'] == ['c']
+    assert record['spilled'] == 3
+    assert record['position'] == 0
+    assert record['offset'] == 5000